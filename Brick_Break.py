@@ -1,53 +1,38 @@
 # brick_breaker_tk.py
 
 import tkinter as tk
+import argparse
+import random
 import sys
-
-# --- Game Constants ---
-WINDOW_WIDTH = 600
-WINDOW_HEIGHT = 400
-MAX_LIVES = 3 
-
-# --- Colors ---
-PADDLE_COLOR = "#B7CD28"
-PADDLE_EDGE_COLOR = "#91A921" # Slightly darker color for the rounded edges
-BALL_COLOR = "#E79625"
-BACKGROUND_COLOR = "#597C9F"
-BRICK_COLOR = "#203F8C"
-FRONTPAGE_BG = "#97869D"
-FRONTPAGE_PANEL = '#3D0070'
-BUTTON_COLOR = '#FFD966'
-BUTTON_HOVER = '#FFB347'
-
-# --- Ball & Movement Constants ---
-BASE_SPEED = 4
-BALL_RADIUS = 8
-BALL_START_DX = BASE_SPEED
-BALL_START_DY = -BASE_SPEED
-PADDLE_SPEED = 15
-
-# --- Game Objects Constants ---
-PADDLE_WIDTH = 100
-PADDLE_HEIGHT = 15
-PADDLE_START_X = (WINDOW_WIDTH - PADDLE_WIDTH) // 2
-PADDLE_START_Y = WINDOW_HEIGHT - 30
-PADDLE_CORNER_RADIUS = 7 # Half of PADDLE_HEIGHT for smooth rounded ends
-
-BALL_START_X = WINDOW_WIDTH // 2
-BALL_START_Y = WINDOW_HEIGHT // 2
-
-# --- Brick Constants ---
-BRICK_ROWS = 5
-BRICK_COLS = 10
-BRICK_WIDTH = 50
-BRICK_HEIGHT = 15
-BRICK_PADDING = 10
-BRICK_OFFSET_TOP = 40
-BRICK_OFFSET_LEFT = 35
+import time
+
+from constants import (
+    WINDOW_WIDTH, WINDOW_HEIGHT, MAX_LIVES,
+    BACKGROUND_COLOR, FRONTPAGE_PANEL, BUTTON_COLOR, BUTTON_HOVER,
+    RENDER_INTERVAL_MS, PHYSICS_HZ, REWIND_STEP_SECONDS,
+    COUNTDOWN_SECONDS, LIFE_LOST_SECONDS,
+    SPEED_MULTIPLIERS, PADDLE_SIZES, BRICK_COLORS,
+)
+from engine import Engine, board_size, EVENT_LIFE_LOST, EVENT_GAME_OVER, EVENT_WON
+from levels import load_level
+from autopilot import Autopilot
+from scenes import Scene, SceneManager
+from snapshot import RewindBuffer
+from timers import Scheduler
+from scores import ScoreStore, run_row
+from netclient import NetClient
+from protocol import apply_state
+from loop import FixedTimestep, LagMonitor
+from render import CanvasRenderer, tcl_quote
+from profiler import FrameProfiler, PHYSICS, COLLISION, RENDER, LAG
+from replay import (
+    InputRecorder, Replayer, Recording, encode, apply_moves, final_state,
+    FROZEN, START, PAUSE, RESUME,
+)
 
 class Game(tk.Frame):
     """Controls the main game window, canvas, and game loop."""
-    def __init__(self, master):
+    def __init__(self, master, level_path=None, client=None):
         super().__init__(master)
         master.title("Tkinter Brick Breaker")
 
@@ -66,132 +51,105 @@ class Game(tk.Frame):
         font=("Helvetica", 10, "italic"),
         fill="white")
 
-        # --- SCORE ---
-        self.score = 0
-        self.score_text = self.canvas.create_text(
-            10, 10,
-            text="Score: 0",
-            anchor="nw",
-            font=("Helvetica", 14, "bold"),
-            fill="white",
-            tags="score"
-        )
-        
-        # --- LIVES ---
-        self.lives = MAX_LIVES
-        self.lives_text = self.canvas.create_text(
-            WINDOW_WIDTH // 2, 10,
-            text=f"Lives: {self.lives}",
-            anchor="n",
-            font=("Helvetica", 14, "bold"),
-            fill="#FF4C4C", # Red color for emphasis
-            tags="lives"
-        )
-
-        # Create game objects
-        # The paddle is now drawn by a method that manages multiple canvas IDs
-        self.paddle_ids = []
-        self.draw_paddle(PADDLE_START_X)
-        
-        self.ball_id = self.canvas.create_oval(
-            BALL_START_X - BALL_RADIUS, BALL_START_Y - BALL_RADIUS,
-            BALL_START_X + BALL_RADIUS, BALL_START_Y + BALL_RADIUS,
-            fill=BALL_COLOR, tags='ball_tag'
-        )
+        # The headless engine owns all game state; the canvas only shows it.
+        # A level file may make the board bigger than the canvas.
+        self.level_path = level_path
+        if level_path is not None:
+            level = load_level(level_path)
+            width, height = board_size(level.rows, level.cols)
+            self.engine = Engine(width=width, height=height, level=level)
+        else:
+            self.engine = Engine()
+        # Physics runs at a fixed rate; rendering interpolates between steps
+        self.timestep = FixedTimestep()
+        self.prev_balls = self.engine.balls.snapshot()
+        # When frames arrive late, drawing is shed but physics is not
+        self.lag = LagMonitor(RENDER_INTERVAL_MS / 1000)
 
-        # Game state
-        self.bricks = []
-        self.setup_bricks()
+        # Score, lives, paddle, ball and bricks are drawn from the engine
+        # state once per frame, sending Tk only what changed
+        self.renderer = CanvasRenderer(self.canvas, self.engine)
 
         self.game_running = False
+        self.game_ended = False # GAME OVER is up until SPACE goes home
 
         # PAUSE VARIABLES
-        self.paused = False
-        self.stored_dx = BALL_START_DX
-        self.stored_dy = BALL_START_DY
-
-        self.ball_dx = BALL_START_DX
-        self.ball_dy = BALL_START_DY
-
-        # For frontpage widgets
-        self.frontpage_items = []
-
-        # Bindings
-        self.master.bind('<Left>', lambda event: self.move_paddle(-PADDLE_SPEED))
-        self.master.bind('<Right>', lambda event: self.move_paddle(PADDLE_SPEED))
+        self.paused = False # Paused with P
+        self.counting_down = False # Ball stays frozen until the countdown ends
+        self.life_lost = False # Frozen while the lost-life message shows
+
+        # Countdowns and messages run on game time: one tick per physics step
+        self.timers = Scheduler()
+        self.countdown_timer = None
+        self.server_tick = None # Last server tick seen, in client mode
+
+        # Settings screen choices
+        self.temp_ball_speed = 'Normal'
+        self.temp_paddle_size = 'Normal'
+        self.temp_brick_color = 'Blue'
+
+        # Bindings: arrow keys are tracked as held or not and polled once per
+        # physics tick, so OS key repeat plays no part in paddle movement
+        self.held_left = False
+        self.held_right = False
+        self.master.bind('<KeyPress-Left>', lambda event: self.hold_key('Left', True))
+        self.master.bind('<KeyRelease-Left>', lambda event: self.hold_key('Left', False))
+        self.master.bind('<KeyPress-Right>', lambda event: self.hold_key('Right', True))
+        self.master.bind('<KeyRelease-Right>', lambda event: self.hold_key('Right', False))
+        self.master.bind('<FocusOut>', lambda event: self.release_keys())
         self.master.bind('<Return>', lambda event: self.start_game())
         
         # Bind Pause + Resume keys
         self.master.bind('p', self.pause_game)
         self.master.bind('r', self.resume_game)
 
+        # Frame profiler: F3 shows timings, F4 saves a Chrome trace
+        self.profiler = None
+        self.master.bind('<F3>', self.toggle_profiler)
+        self.master.bind('<F4>', self.export_trace)
+
+        # Key presses are applied once per physics tick, which makes every
+        # game recordable; F6 saves the current or last game as a replay
+        self.pending_left = 0
+        self.pending_right = 0
+        self.recorder = None
+        self.replayer = None
+        self.last_recording = None
+        self.master.bind('<F6>', self.save_recording)
+
+        # Autopilot (F7) presses the arrow keys itself, e.g. for a demo
+        self.autopilot = None
+        self.master.bind('<F7>', self.toggle_autopilot)
+
+        # The last few seconds of a recorded game; Backspace steps back
+        self.history = RewindBuffer(self.engine)
+        self.master.bind('<BackSpace>', self.rewind_game)
+
+        # With a client, games run on a session server and this is only a view
+        self.client = client
+
+        # Every finished game is kept; the store writes on its own thread
+        self.scores = ScoreStore()
+        self.run_started = None
+        self.last_run = None # (finished, seed) of the last stored game
+
+        # Menu screens are built once up front and then shown or hidden
+        self.scenes = SceneManager()
+        self.scenes.add('front', self.build_frontpage())
+        self.scenes.add('settings', self.build_settings())
+
         # Display front page
         self.show_frontpage()
         self.game_loop()
 
-    # --- Utility Functions ---
-
-    def draw_paddle(self, x):
-        """Draws a rounded paddle using a rectangle and two ovals."""
-        
-        # 1. Delete previous paddle parts if they exist
-        for id in self.paddle_ids:
-            self.canvas.delete(id)
-        self.paddle_ids = []
-        
-        x1 = x
-        y1 = PADDLE_START_Y
-        x2 = x + PADDLE_WIDTH
-        y2 = PADDLE_START_Y + PADDLE_HEIGHT
-        r = PADDLE_CORNER_RADIUS # Radius for the rounded corner
-
-        # 2. Draw the main central rectangle (slightly shorter to accommodate corners)
-        rect_id = self.canvas.create_rectangle(
-            x1 + r, y1, x2 - r, y2,
-            fill=PADDLE_COLOR, outline=PADDLE_COLOR, tags=('paddle_tag', 'paddle_rect')
-        )
-        self.paddle_ids.append(rect_id)
-
-        # 3. Draw the left semicircle (as a full circle)
-        left_circle_id = self.canvas.create_oval(
-            x1, y1, x1 + PADDLE_HEIGHT, y2, # x1 to x1 + HIGHT
-            fill=PADDLE_COLOR, outline=PADDLE_EDGE_COLOR, width=2, tags='paddle_tag'
-        )
-        self.paddle_ids.append(left_circle_id)
-
-        # 4. Draw the right semicircle (as a full circle)
-        right_circle_id = self.canvas.create_oval(
-            x2 - PADDLE_HEIGHT, y1, x2, y2, # x2 - HIGHT to x2
-            fill=PADDLE_COLOR, outline=PADDLE_EDGE_COLOR, width=2, tags='paddle_tag'
-        )
-        self.paddle_ids.append(right_circle_id)
-        
-    def get_paddle_coords(self):
-        """Returns the bounding box of the paddle (using the first drawn part)."""
-        if not self.paddle_ids:
-            return [PADDLE_START_X, PADDLE_START_Y, PADDLE_START_X + PADDLE_WIDTH, PADDLE_START_Y + PADDLE_HEIGHT]
-        
-        # We use the bounding box of the whole 'paddle_tag' group
-        # The rect_id is usually the first element in self.paddle_ids
-        coords_list = self.canvas.find_withtag('paddle_tag')
-        if not coords_list:
-            return [PADDLE_START_X, PADDLE_START_Y, PADDLE_START_X + PADDLE_WIDTH, PADDLE_START_Y + PADDLE_HEIGHT]
-
-        # Use bbox to get the combined bounding box of all paddle components
-        bbox = self.canvas.bbox('paddle_tag')
-        if bbox is None:
-            return [PADDLE_START_X, PADDLE_START_Y, PADDLE_START_X + PADDLE_WIDTH, PADDLE_START_Y + PADDLE_HEIGHT]
-            
-        return list(bbox)
-        
     # --- Pause & Resume with Countdown ---
     def pause_game(self, event=None):
-        if self.game_running and not self.paused:
+        if (self.game_running and not self.paused and not self.life_lost
+                and self.replayer is None and self.client is None):
             self.paused = True
-            self.stored_dx = self.ball_dx
-            self.stored_dy = self.ball_dy
-            self.ball_dx = 0
-            self.ball_dy = 0
+            if self.recorder is not None:
+                self.recorder.event(PAUSE)
+            self.stop_countdown() # Resuming counts down from the top again
 
             # Show "Game Paused" text
             self.paused_text_id = self.canvas.create_text(
@@ -203,8 +161,11 @@ class Game(tk.Frame):
             )
 
     def resume_game(self, event=None):
-        if self.game_running and self.paused:
+        if (self.game_running and self.paused and self.replayer is None
+                and self.client is None):
             self.paused = False
+            if self.recorder is not None:
+                self.recorder.event(RESUME)
 
             # Remove paused text
             self.canvas.delete("paused")
@@ -214,293 +175,268 @@ class Game(tk.Frame):
 
     def start_countdown(self, count):
         """Displays a countdown from count to 1, then resumes ball movement."""
+        self.stop_countdown()
         if count > 0:
-            self.canvas.delete("countdown")
-            self.countdown_text_id = self.canvas.create_text(
-                WINDOW_WIDTH/2, WINDOW_HEIGHT/2,
-                text=str(count),
-                font=("Helvetica", 48, "bold"),
-                fill="red",
-                tags="countdown"
-            )
-            self.master.after(1000, lambda: self.start_countdown(count - 1))
+            self.counting_down = True
+            # Lagging frames skip the decoration; the countdown takes as long
+            if not self.lag.degraded:
+                self.countdown_text_id = self.canvas.create_text(
+                    WINDOW_WIDTH/2, WINDOW_HEIGHT/2,
+                    text=str(count),
+                    font=("Helvetica", 48, "bold"),
+                    fill="red",
+                    tags="countdown"
+                )
+            self.countdown_timer = self.timers.after(COUNTDOWN_SECONDS * PHYSICS_HZ,
+                                                     self.start_countdown, count - 1)
         else:
-            # Remove countdown and restore ball movement
-            self.canvas.delete("countdown")
-            self.ball_dx = self.stored_dx
-            self.ball_dy = self.stored_dy
+            # Restore ball movement
+            self.counting_down = False
+
+    def stop_countdown(self):
+        """Cancels the next countdown step and clears the number."""
+        if self.countdown_timer is not None:
+            self.countdown_timer.cancel()
+            self.countdown_timer = None
+        self.canvas.delete("countdown")
 
 
     # --- Front Page ---
-    def show_frontpage(self):
-        self.hide_frontpage()
+    def build_frontpage(self):
+        """Creates the front page once; show_frontpage only reveals it."""
+        scene = Scene(self.canvas, 'fp')
 
+        # Create a gradient background, pre-rendered into one image
+        self.gradient = tk.PhotoImage(width=WINDOW_WIDTH, height=WINDOW_HEIGHT)
         for i in range(20):
-            # Create a gradient background
             r = 43 + i * 5
             b = 59 + i * 4
             color = f'#{r:02x}00{b:02x}'
-            self.canvas.create_rectangle(0, i*20, WINDOW_WIDTH, (i+1)*20,
-                                         fill=color, outline=color, tags='fp')
+            self.gradient.put(color, to=(0, i*20, WINDOW_WIDTH, (i+1)*20))
+        self.canvas.create_image(0, 0, image=self.gradient, anchor='nw', tags='fp')
 
-        panel = self.canvas.create_rectangle(50, 50, WINDOW_WIDTH-50, WINDOW_HEIGHT-50,
-                                             fill=FRONTPAGE_PANEL, outline='#FFFFFF',
-                                             width=2, tags='fp')
-        self.frontpage_items.append(panel)
+        self.canvas.create_rectangle(50, 50, WINDOW_WIDTH-50, WINDOW_HEIGHT-50,
+                                     fill=FRONTPAGE_PANEL, outline='#FFFFFF',
+                                     width=2, tags='fp')
 
-        title = self.canvas.create_text(WINDOW_WIDTH/2, 90, text='BRICK BREAKER',
-                                         font=('Helvetica', 42, 'bold'),
-                                         fill='#FFD966', tags='fp')
-        self.frontpage_items.append(title)
+        self.canvas.create_text(WINDOW_WIDTH/2, 90, text='BRICK BREAKER',
+                                font=('Helvetica', 42, 'bold'),
+                                fill='#FFD966', tags='fp')
 
-        subtitle = self.canvas.create_text(WINDOW_WIDTH/2, 140, text='Classic Arcade Fun!',
-                                            font=('Helvetica', 16), fill='#FFFFFF', tags='fp')
-        self.frontpage_items.append(subtitle)
+        self.canvas.create_text(WINDOW_WIDTH/2, 140, text='Classic Arcade Fun!',
+                                font=('Helvetica', 16), fill='#FFFFFF', tags='fp')
 
         # Logo updated to be smaller and more centered
-        logo = self.canvas.create_oval(WINDOW_WIDTH/2 - 40, 170, WINDOW_WIDTH/2 + 40, 250,
-                                        fill='#4B0082', outline='#FFD966', width=4, tags='fp')
-        self.frontpage_items.append(logo)
-        logo_text = self.canvas.create_text(WINDOW_WIDTH/2, 210, text='BB',
-                                             font=('Helvetica', 32, 'bold'),
-                                             fill='#FFD966', tags='fp')
-        self.frontpage_items.append(logo_text)
+        self.canvas.create_oval(WINDOW_WIDTH/2 - 40, 170, WINDOW_WIDTH/2 + 40, 250,
+                                fill='#4B0082', outline='#FFD966', width=4, tags='fp')
+        self.canvas.create_text(WINDOW_WIDTH/2, 210, text='BB',
+                                font=('Helvetica', 32, 'bold'),
+                                fill='#FFD966', tags='fp')
 
         # Buttons - moved slightly down and adjusted x to make room for 3
         self.create_frontpage_button('Start Game', WINDOW_WIDTH/2 - 120, 280, self.start_game)
         self.create_frontpage_button('Settings', WINDOW_WIDTH/2, 280, self.show_settings)
         self.create_frontpage_button('Exit', WINDOW_WIDTH/2 + 120, 280, self.quit_game)
 
-        note = self.canvas.create_text(WINDOW_WIDTH/2, 360,
-                                         text='Use ← → to move — Press ENTER to start — P=Pause, R=Resume',
-                                         font=('Helvetica', 10), fill='#CCCCCC', tags='fp')
-        self.frontpage_items.append(note)
+        self.canvas.create_text(WINDOW_WIDTH/2, 360,
+                                text='Use ← → to move — Press ENTER to start — P=Pause, R=Resume',
+                                font=('Helvetica', 10), fill='#CCCCCC', tags='fp')
+        return scene
 
     def create_frontpage_button(self, text, x, y, command):
         btn = tk.Button(self.master, text=text, font=('Helvetica', 12, 'bold'),
                          bg=BUTTON_COLOR, activebackground=BUTTON_HOVER, command=command)
-        btn_id = self.canvas.create_window(x, y, window=btn, tags='fp')
-        self.frontpage_items.append(btn_id)
+        self.canvas.create_window(x, y, window=btn, tags='fp')
+
+    def show_frontpage(self):
+        self.scenes.show('front')
 
     def hide_frontpage(self):
-        self.canvas.delete('fp')
-        # Clean up widgets placed using create_window
-        for item_id in self.frontpage_items:
-            # Check if the item is a window (button)
-            try:
-                widget_name = self.canvas.itemcget(item_id, "window")
-                if widget_name:
-                    if widget_name in self.master.children:
-                        self.master.children[widget_name].destroy()
-            except tk.TclError:
-                # Catch case where item is not a window or is already deleted
-                pass
-        self.frontpage_items = []
+        self.scenes.hide()
 
-    def show_settings(self):
-        # Remove frontpage or previous settings
-        self.hide_frontpage()
-        self.canvas.delete('settings')
-        if hasattr(self, 'settings_widgets'):
-            for w in self.settings_widgets:
-                w.destroy()
-        self.settings_widgets = []
+    # --- Settings ---
+    def build_settings(self):
+        """Creates the settings screen once; show_settings only reveals it."""
+        scene = Scene(self.canvas, 'settings')
 
         # Settings title
         self.canvas.create_text(WINDOW_WIDTH/2, 50,
-                                 text='Settings',
-                                 font=('Helvetica', 24, 'bold'),
-                                 fill='white', tags='settings')
-
-        # Default values for settings (use current values if already set)
-        if not hasattr(self, 'temp_ball_speed'):
-            self.temp_ball_speed = 'Normal'
-        if not hasattr(self, 'temp_paddle_size'):
-            self.temp_paddle_size = 'Normal'
-        if not hasattr(self, 'temp_brick_color'):
-            self.temp_brick_color = 'Blue'
+                                text='Settings',
+                                font=('Helvetica', 24, 'bold'),
+                                fill='white', tags='settings')
 
         # --- Ball Speed ---
-        # Positioning labels and menus relative to the canvas
         label_speed = tk.Label(self.master, text="Ball Speed:", bg=BACKGROUND_COLOR, fg='white')
-        label_speed.place(x=150 + self.canvas.winfo_x(), y=100 + self.canvas.winfo_y())
-        self.settings_widgets.append(label_speed)
-
-        speed_var = tk.StringVar(value=self.temp_ball_speed)
-        speed_menu = tk.OptionMenu(self.master, speed_var, 'Slow', 'Normal', 'Fast')
-        speed_menu.place(x=250 + self.canvas.winfo_x(), y=95 + self.canvas.winfo_y())
-        self.settings_widgets.append(speed_menu)
+        scene.add_widget(label_speed, 150, 100)
+        self.speed_var = tk.StringVar(value=self.temp_ball_speed)
+        scene.add_widget(tk.OptionMenu(self.master, self.speed_var, *SPEED_MULTIPLIERS), 250, 95)
 
         # --- Paddle Size ---
         label_paddle = tk.Label(self.master, text="Paddle Size:", bg=BACKGROUND_COLOR, fg='white')
-        label_paddle.place(x=150 + self.canvas.winfo_x(), y=150 + self.canvas.winfo_y())
-        self.settings_widgets.append(label_paddle)
-
-        paddle_var = tk.StringVar(value=self.temp_paddle_size)
-        paddle_menu = tk.OptionMenu(self.master, paddle_var, 'Small', 'Normal', 'Large')
-        paddle_menu.place(x=250 + self.canvas.winfo_x(), y=145 + self.canvas.winfo_y())
-        self.settings_widgets.append(paddle_menu)
+        scene.add_widget(label_paddle, 150, 150)
+        self.paddle_var = tk.StringVar(value=self.temp_paddle_size)
+        scene.add_widget(tk.OptionMenu(self.master, self.paddle_var, *PADDLE_SIZES), 250, 145)
 
         # --- Brick Color ---
         label_brick = tk.Label(self.master, text="Brick Color:", bg=BACKGROUND_COLOR, fg='white')
-        label_brick.place(x=150 + self.canvas.winfo_x(), y=200 + self.canvas.winfo_y())
-        self.settings_widgets.append(label_brick)
-
-        brick_var = tk.StringVar(value=self.temp_brick_color)
-        brick_menu = tk.OptionMenu(self.master, brick_var, 'Blue', 'Red', 'Green')
-        brick_menu.place(x=250 + self.canvas.winfo_x(), y=195 + self.canvas.winfo_y())
-        self.settings_widgets.append(brick_menu)
-
-        # --- Save button ---
-        def save_settings():
-            # Apply Ball Speed
-            val = speed_var.get()
-            speed_multiplier = {'Slow': 0.5, 'Normal': 1.0, 'Fast': 1.5}
-            multiplier = speed_multiplier.get(val, 1.0)
-            self.ball_dx = BASE_SPEED * multiplier
-            self.ball_dy = -BASE_SPEED * multiplier
-            self.stored_dx = self.ball_dx
-            self.stored_dy = self.ball_dy
-            self.temp_ball_speed = val
-
-            # Apply Paddle Size
-            val = paddle_var.get()
-            size_map = {'Small': 60, 'Normal': 100, 'Large': 140}
-            global PADDLE_WIDTH # Need global to modify constant
-            PADDLE_WIDTH = size_map.get(val, 100)
-            self.temp_paddle_size = val
-            
-            # Update paddle position based on current x-coordinate
-            current_coords = self.get_paddle_coords()
-            current_x1 = current_coords[0]
-            current_x2 = current_coords[2]
-            center_x = (current_x1 + current_x2) / 2
-            
-            new_x1 = center_x - PADDLE_WIDTH / 2
-            self.draw_paddle(new_x1)
-
-
-            # Apply Brick Color
-            val = brick_var.get()
-            color_map = {'Blue':'#203F8C', 'Red':'#FF4C4C', 'Green':'#28B78F'}
-            global BRICK_COLOR
-            BRICK_COLOR = color_map.get(val, '#203F8C')
-            self.setup_bricks()
-            self.temp_brick_color = val
-
-            # Close settings
-            close_settings()
-
-        # --- Reset button ---
-        def reset_settings():
-            speed_var.set('Normal')
-            paddle_var.set('Normal')
-            brick_var.set('Blue')
-
-        # --- Close settings ---
-        def close_settings():
-            for w in self.settings_widgets:
-                w.destroy()
-            self.settings_widgets = []
-            self.canvas.delete('settings')
-            self.show_frontpage()
-
-        # Place buttons relative to the canvas frame
-        save_btn = tk.Button(self.master, text='Save', bg=BUTTON_COLOR, command=save_settings)
-        save_btn.place(x=WINDOW_WIDTH/2 - 60 + self.canvas.winfo_x(), y=260 + self.canvas.winfo_y())
-        self.settings_widgets.append(save_btn)
-
-        reset_btn = tk.Button(self.master, text='Reset', bg=BUTTON_COLOR, command=reset_settings)
-        reset_btn.place(x=WINDOW_WIDTH/2 + 20 + self.canvas.winfo_x(), y=260 + self.canvas.winfo_y())
-        self.settings_widgets.append(reset_btn)
-
-        back_btn = tk.Button(self.master, text='Back', bg=BUTTON_COLOR, command=close_settings)
-        back_btn.place(x=WINDOW_WIDTH/2 - 20 + self.canvas.winfo_x(), y=310 + self.canvas.winfo_y())
-        self.settings_widgets.append(back_btn)
+        scene.add_widget(label_brick, 150, 200)
+        self.brick_var = tk.StringVar(value=self.temp_brick_color)
+        scene.add_widget(tk.OptionMenu(self.master, self.brick_var, *BRICK_COLORS), 250, 195)
+
+        # Buttons
+        save_btn = tk.Button(self.master, text='Save', bg=BUTTON_COLOR, command=self.save_settings)
+        scene.add_widget(save_btn, WINDOW_WIDTH/2 - 60, 260)
+        reset_btn = tk.Button(self.master, text='Reset', bg=BUTTON_COLOR, command=self.reset_settings)
+        scene.add_widget(reset_btn, WINDOW_WIDTH/2 + 20, 260)
+        back_btn = tk.Button(self.master, text='Back', bg=BUTTON_COLOR, command=self.close_settings)
+        scene.add_widget(back_btn, WINDOW_WIDTH/2 - 20, 310)
+        return scene
+
+    def show_settings(self):
+        # Menus start from the current values
+        self.speed_var.set(self.temp_ball_speed)
+        self.paddle_var.set(self.temp_paddle_size)
+        self.brick_var.set(self.temp_brick_color)
+        self.scenes.show('settings')
+
+    def save_settings(self):
+        # Apply Ball Speed
+        val = self.speed_var.get()
+        multiplier = SPEED_MULTIPLIERS.get(val, 1.0)
+        self.engine.configure(speed=multiplier)
+        self.temp_ball_speed = val
+
+        # Apply Paddle Size
+        val = self.paddle_var.get()
+        # The engine keeps the paddle centred while resizing it
+        self.engine.configure(paddle_width=PADDLE_SIZES.get(val, 100))
+        self.temp_paddle_size = val
+
+        # Apply Brick Color
+        val = self.brick_var.get()
+        if val != self.temp_brick_color:
+            self.renderer.brick_color = BRICK_COLORS.get(val, '#203F8C')
+            self.renderer.setup_bricks()
+        self.temp_brick_color = val
+
+        # Close settings
+        self.close_settings()
+
+    def reset_settings(self):
+        self.speed_var.set('Normal')
+        self.paddle_var.set('Normal')
+        self.brick_var.set('Blue')
+
+    def close_settings(self):
+        self.show_frontpage()
 
     # --- Game Functions ---
     def start_game(self):
-        if not self.game_running:
+        if not self.game_running and not self.game_ended:
+            if self.client is not None:
+                # The server picks the seed; connect before touching any state
+                try:
+                    seed = self.client.connect(self.current_settings())
+                except OSError as error:
+                    print(f"Could not start a game on the server: {error}")
+                    return # Still on the front page
             self.hide_frontpage()
             self.game_running = True
-            # Re-ensure lives display is up-to-date
-            self.canvas.itemconfig(self.lives_text, text=f"Lives: {self.lives}")
+            self.run_started = time.monotonic()
+            if self.client is not None:
+                # Mirror the server's game from the start
+                self.server_tick = None
+                self.engine.reset(seed=seed)
+                self.renderer.setup_bricks()
+            elif self.replayer is None:
+                # Fresh seed per game, recorded so the game can be replayed
+                seed = random.randrange(2**32)
+                self.engine.reset(seed=seed)
+                self.renderer.setup_bricks()
+                self.recorder = InputRecorder(self.current_settings(), seed)
+                self.recorder.event(START)
+                self.history.clear()
+
+    def current_settings(self):
+        """The settings screen choices, as stored with recordings."""
+        settings = {'ball_speed': self.temp_ball_speed,
+                    'paddle_size': self.temp_paddle_size,
+                    'brick_color': self.temp_brick_color}
+        if self.level_path is not None:
+            settings['level'] = self.level_path
+        return settings
 
     def lose_life(self):
-        """Decrements a life and resets the ball/paddle if lives remain."""
-        self.lives -= 1
-        self.canvas.itemconfig(self.lives_text, text=f"Lives: {self.lives}")
-        
-        if self.lives <= 0:
-            self.game_over()
-        else:
-            # Reset ball and paddle to starting positions
-            self.draw_paddle(PADDLE_START_X) # Redraw paddle at start position
-            self.canvas.coords(self.ball_id, BALL_START_X - BALL_RADIUS, BALL_START_Y - BALL_RADIUS,
-                               BALL_START_X + BALL_RADIUS, BALL_START_Y + BALL_RADIUS)
-            
-            # Reset ball movement direction/speed
-            self.ball_dx = self.stored_dx # Use stored/configured speed
-            self.ball_dy = self.stored_dy # Use stored/configured speed
-            
-            # Briefly pause and display a message before continuing
-            self.paused = True
-            self.canvas.delete("reset_msg")
-            self.canvas.create_text(
-                WINDOW_WIDTH/2, WINDOW_HEIGHT/2,
-                text=f"Life Lost! {self.lives} Remaining.",
-                font=("Helvetica", 24, "bold"),
-                fill="red",
-                tags="reset_msg"
-            )
-            # Resume after 2 seconds
-            self.master.after(2000, self.clear_reset_msg_and_resume)
-            
+        """Shows a lost life; the engine has already reset the ball/paddle."""
+        # Briefly freeze and display a message before continuing
+        self.life_lost = True
+        self.canvas.delete("reset_msg")
+        self.canvas.create_text(
+            WINDOW_WIDTH/2, WINDOW_HEIGHT/2,
+            text=f"Life Lost! {self.engine.lives} Remaining.",
+            font=("Helvetica", 24, "bold"),
+            fill="red",
+            tags="reset_msg"
+        )
+        # Resume after LIFE_LOST_SECONDS of game time
+        self.timers.after(LIFE_LOST_SECONDS * PHYSICS_HZ, self.clear_reset_msg_and_resume)
+
     def clear_reset_msg_and_resume(self):
         self.canvas.delete("reset_msg")
-        self.paused = False
+        self.life_lost = False
 
     def reset_game(self, event=None):
         self.canvas.delete("game_over_tag")
-        self.score = 0
-        self.lives = MAX_LIVES # Reset lives
-        self.canvas.itemconfig(self.score_text, text="Score: 0")
-        self.canvas.itemconfig(self.lives_text, text=f"Lives: {self.lives}")
+        self.game_ended = False
+        self.engine.reset()
 
         self.master.unbind('<space>')
         self.master.unbind('<Escape>')
         
-        self.draw_paddle(PADDLE_START_X) # Redraw paddle at start position
-        
-        self.canvas.coords(self.ball_id, BALL_START_X - BALL_RADIUS, BALL_START_Y - BALL_RADIUS,
-                           BALL_START_X + BALL_RADIUS, BALL_START_Y + BALL_RADIUS)
-
-        # Reset ball direction based on stored/configured speed
-        self.ball_dx = self.stored_dx
-        self.ball_dy = self.stored_dy
-        
-        self.setup_bricks()
+        self.renderer.setup_bricks()
         self.game_running = False
         self.paused = False
+        self.stop_countdown()
+        self.counting_down = False
+        self.life_lost = False
 
         self.show_frontpage()
 
     def quit_game(self, event=None):
+        self.scores.close() # Writes whatever is still queued
         self.master.destroy()
         sys.exit()
 
     def game_over(self):
         self.game_running = False
+        self.game_ended = True
         self.paused = True # Stop movement immediately
+        self.timers.clear() # Nothing pending outlives the game
         
         self.canvas.delete("reset_msg") # Clean up any life lost message
+        self.canvas.delete("countdown")
+
+        if self.recorder is not None:
+            self.last_recording = self.recorder.finish(self.engine)
+            self.recorder = None
+        live = self.replayer is None # Replays were stored when first played
+        if self.replayer is not None:
+            self.finish_replay()
+        if self.client is not None:
+            self.client.close()
+        if live:
+            self.store_run()
 
         self.canvas.create_text(WINDOW_WIDTH / 2, WINDOW_HEIGHT / 3,
                                  text='GAME OVER!', fill='Orange',
                                  font=('Arial', 30, 'bold'), tags='game_over_tag')
         self.canvas.create_text(WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2,
-                                 text=f'Final Score: {self.score}', fill='yellow',
+                                 text=f'Final Score: {self.engine.score}', fill='yellow',
                                  font=('Arial', 24, 'bold'), tags='game_over_tag')
+        best = max(self.best_score() or 0, self.engine.score)
+        self.canvas.create_text(WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2 + 28,
+                                 text=f'Best: {best}', fill='white',
+                                 font=('Arial', 14), tags='game_over_tag')
         self.canvas.create_text(WINDOW_WIDTH / 2, WINDOW_HEIGHT / 2 + 50,
                                  text='Press SPACE to Home', fill='white',
                                  font=('Arial', 14), tags='game_over_tag')
@@ -511,104 +447,267 @@ class Game(tk.Frame):
         self.master.bind('<space>', self.reset_game)
         self.master.bind('<Escape>', self.quit_game)
 
+    def store_run(self):
+        """Queues the finished game for the score store; never waits on disk."""
+        engine = self.engine
+        row = run_row(self.current_settings(), engine.score, MAX_LIVES - engine.lives,
+                      won=engine.bricks_left == 0,
+                      seconds=time.monotonic() - self.run_started, seed=engine.seed,
+                      source='net' if self.client is not None else 'tk')
+        self.scores.record(row)
+        self.last_run = (row[0], engine.seed)
+
+    def best_score(self):
+        """The best stored score with the current settings, without touching disk."""
+        settings = self.current_settings()
+        return self.scores.best_known(settings['ball_speed'], settings['paddle_size'],
+                                      settings.get('level') or '')
+
+    def hold_key(self, key, held):
+        if key == 'Left':
+            self.held_left = held
+        else:
+            self.held_right = held
+
+    def release_keys(self):
+        # Releases are missed while the window is not focused
+        self.held_left = False
+        self.held_right = False
+
     def move_paddle(self, offset):
-        if not self.game_running or self.paused:
+        """Queues one discrete paddle move of PADDLE_SPEED."""
+        if (not self.game_running or self.paused or self.life_lost
+                or self.replayer is not None):
             return
             
-        coords = self.get_paddle_coords()
-        new_x1 = coords[0] + offset
-        new_x2 = coords[2] + offset
-        
-        if new_x1 >= 0 and new_x2 <= WINDOW_WIDTH:
-            # Move all components of the paddle
-            for id in self.paddle_ids:
-                self.canvas.move(id, offset, 0)
-
-    def check_paddle_collision(self, ball_coords):
-        ball_left, ball_top, ball_right, ball_bottom = ball_coords
-        paddle_coords = self.get_paddle_coords() # Use the bounding box
-        paddle_left, paddle_top, paddle_right, paddle_bottom = paddle_coords
-        
-        # Check if the ball is moving down, hits the paddle's vertical region, 
-        # and overlaps horizontally.
-        if self.ball_dy > 0 and paddle_top <= ball_bottom <= paddle_bottom and \
-           paddle_left <= ball_right and ball_left <= paddle_right:
-            self.ball_dy *= -1
-            
-            # Add simple angle deflection based on where it hit the paddle
-            paddle_center = (paddle_left + paddle_right) / 2
-            ball_center_x = (ball_left + ball_right) / 2
-            
-            # Calculate hit distance from center (clamped between -1 and 1 for full width)
-            hit_ratio = (ball_center_x - paddle_center) / (PADDLE_WIDTH / 2)
-            
-            # Small horizontal speed adjustment (max 1 unit)
-            self.ball_dx += hit_ratio * 1 
-            self.stored_dx += hit_ratio * 1 # Update stored speed
-            
-            # Ensure speed does not get excessive
-            max_speed = BASE_SPEED * 2
-            current_speed = (self.ball_dx**2 + self.ball_dy**2)**0.5
-            if current_speed > max_speed:
-                scale = max_speed / current_speed
-                self.ball_dx *= scale
-                self.ball_dy *= scale
-                self.stored_dx = self.ball_dx
-                self.stored_dy = self.ball_dy
-
-
-    def check_brick_collision(self, ball_coords):
-        overlapping = self.canvas.find_overlapping(*ball_coords)
-        for obj_id in overlapping:
-            if obj_id in self.bricks:
-                self.canvas.delete(obj_id)
-                self.bricks.remove(obj_id)
-
-                self.score += 1
-                self.canvas.itemconfig(self.score_text, text=f"Score: {self.score}")
-
-                self.ball_dy *= -1
-                return
-
-    def setup_bricks(self):
-        self.canvas.delete('brick')
-        self.bricks = []
-        for row in range(BRICK_ROWS):
-            for col in range(BRICK_COLS):
-                brick_x1 = BRICK_OFFSET_LEFT + col * (BRICK_WIDTH + BRICK_PADDING)
-                brick_y1 = BRICK_OFFSET_TOP + row * (BRICK_HEIGHT + BRICK_PADDING)
-                brick_x2 = brick_x1 + BRICK_WIDTH
-                brick_y2 = brick_y1 + BRICK_HEIGHT
-                brick_id = self.canvas.create_rectangle(brick_x1, brick_y1,
-                                                         brick_x2, brick_y2,
-                                                         fill=BRICK_COLOR, tags='brick')
-                self.bricks.append(brick_id)
+        # Applied at the next physics tick (see tick_input) and drawn on the
+        # next frame
+        if offset < 0:
+            self.pending_left += 1
+        else:
+            self.pending_right += 1
+
+    def tick_input(self):
+        """Returns this physics tick's input code, live or from a replay."""
+        if self.replayer is not None:
+            return self.replayer.next_tick()
+
+        held_left = self.held_left
+        held_right = self.held_right
+        if self.autopilot is not None:
+            # The autopilot holds the arrow keys for the player
+            direction = self.autopilot.direction()
+            held_left = direction < 0
+            held_right = direction > 0
+        # Held keys do nothing while paused, like the old key events
+        steering = not (self.paused or self.life_lost)
+        code = encode(self.pending_left, self.pending_right,
+                      frozen=self.paused or self.counting_down or self.life_lost,
+                      held_left=steering and held_left,
+                      held_right=steering and held_right)
+        self.pending_left = 0
+        self.pending_right = 0
+        if self.recorder is not None:
+            self.recorder.record(code)
+        return code
+
+    def poll_server(self):
+        """Sends the keys and mirrors the server's game into the engine."""
+        steering = not (self.paused or self.life_lost)
+        self.client.send_input(steering and self.held_left, steering and self.held_right,
+                               self.pending_left, self.pending_right)
+        self.pending_left = 0
+        self.pending_right = 0
+        events = 0
+        for state in self.client.poll():
+            events |= apply_state(self.engine, state)
+            if self.server_tick is not None:
+                self.timers.advance(state.tick - self.server_tick) # Server's game time
+            self.server_tick = state.tick
+        if self.client.closed and not events & (EVENT_GAME_OVER | EVENT_WON):
+            events |= EVENT_GAME_OVER # Lost the server; end the game here
+        self.prev_balls = self.engine.balls.snapshot() # States are drawn as they come
+        return events
 
     def game_loop(self):
-        if self.game_running and not self.paused:
-            self.canvas.move(self.ball_id, self.ball_dx, self.ball_dy)
-            ball_coords = self.canvas.coords(self.ball_id)
-            ball_left, ball_top, ball_right, ball_bottom = ball_coords
-
-            if ball_bottom >= WINDOW_HEIGHT:
-                self.lose_life() # Changed from game_over to lose_life
-                
-            if ball_left <= 0 or ball_right >= WINDOW_WIDTH:
-                self.ball_dx *= -1
-
-            if ball_top <= 0:
-                self.ball_dy *= -1
-
-            self.check_paddle_collision(ball_coords)
-            self.check_brick_collision(ball_coords)
-            
-            if not self.bricks:
+        draw = self.lag.frame()
+        self.renderer.degraded = self.lag.degraded
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin_frame()
+            phase_start = profiler.clock()
+            profiler.add(LAG, profiler.frame_start - self.lag.lag, self.lag.lag)
+
+        if self.game_running and self.client is not None:
+            events = self.poll_server()
+        elif self.game_running:
+            events = 0
+            for _ in range(self.timestep.advance()):
+                if not self.paused:
+                    self.timers.advance()
+                if self.recorder is not None:
+                    self.history.capture() # One state per recorded tick
+                code = self.tick_input()
+                if code is None:
+                    self.game_over() # Replay ran out of ticks
+                    break
+                apply_moves(self.engine, code, self.timestep.dt)
+                self.prev_balls = self.engine.balls.snapshot()
+                if code & FROZEN:
+                    continue # Paused, counting down or showing a lost life
+                events |= self.engine.step(self.timestep.dt)
+                if events & (EVENT_LIFE_LOST | EVENT_WON):
+                    break
+
+            if events & EVENT_GAME_OVER:
+                self.game_over()
+            elif events & EVENT_LIFE_LOST:
+                self.prev_balls = self.engine.balls.snapshot() # No tweening a respawn
+                self.lose_life()
+            elif events & EVENT_WON:
                 self.game_over() # Win condition
+        else:
+            # Time spent paused or on menus must not be caught up afterwards
+            self.timestep.reset()
+            self.prev_balls = self.engine.balls.snapshot()
+
+        if profiler is not None:
+            now = profiler.clock()
+            profiler.add(PHYSICS, phase_start, now - phase_start)
+            phase_start = now
+            if profiler.hud_due():
+                self.renderer.queue('itemconfigure', self.profile_text,
+                                    '-text', tcl_quote(profiler.hud_text()))
+
+        if draw:
+            self.render()
+        elif profiler is not None:
+            profiler.count('skipped renders')
+        if profiler is not None and self.lag.degraded:
+            profiler.count('degraded frames')
+
+        if profiler is not None:
+            profiler.add(RENDER, phase_start, profiler.clock() - phase_start)
+            profiler.end_frame()
+        self.lag.expect()
+        self.master.after(RENDER_INTERVAL_MS, self.game_loop)
+
+    def render(self):
+        """Draws the frame, with the balls between the last two physics states."""
+        balls = self.engine.balls
+        version, prev_xs, prev_ys = self.prev_balls
+        if version != balls.version or self.lag.degraded:
+            # Balls were added or removed since the last step, so the old
+            # positions no longer line up; draw where they are now. Lagging
+            # frames skip the tweening too
+            self.renderer.render()
+            return
+        alpha = self.timestep.alpha
+        xs = [prev + (x - prev) * alpha for prev, x in zip(prev_xs, balls.x)]
+        ys = [prev + (y - prev) * alpha for prev, y in zip(prev_ys, balls.y)]
+        self.renderer.render(xs, ys)
+
+    # --- Profiling ---
+    def toggle_profiler(self, event=None):
+        if self.profiler is None:
+            self.profiler = FrameProfiler()
+            # Time the engine's collision search; physics time includes it
+            self.engine.first_contact = self.profiler.timed(COLLISION, self.engine.first_contact)
+            # Overlay sits under the pause/resume hint in the top right
+            self.profile_text = self.canvas.create_text(
+                WINDOW_WIDTH - 10, 28,
+                text="profiling...",
+                anchor="ne",
+                justify="right",
+                font=("Courier", 9),
+                fill="white",
+                tags="profiler")
+        else:
+            del self.engine.first_contact # Back to the plain method
+            self.canvas.delete("profiler")
+            self.profiler = None
+
+    def export_trace(self, event=None):
+        if self.profiler is not None:
+            path = self.profiler.export_trace(time.strftime("brick_trace_%Y%m%d_%H%M%S.json"))
+            print(f"Saved frame trace to {path}")
+
+    # --- Autopilot ---
+    def toggle_autopilot(self, event=None):
+        if self.autopilot is None:
+            self.autopilot = Autopilot(self.engine)
+        else:
+            self.autopilot = None
 
-        self.master.after(30, self.game_loop)
+    # --- Rewind ---
+    def rewind_game(self, event=None):
+        """Steps a live game back a couple of seconds."""
+        if (not self.game_running or self.paused or self.life_lost
+                or self.recorder is None):
+            return
+        steps = self.history.rewind(int(REWIND_STEP_SECONDS * PHYSICS_HZ))
+        if not steps:
+            return
+        self.recorder.rewind(steps) # Keeps the recording replayable
+        self.renderer.setup_bricks()
+        self.prev_balls = self.engine.balls.snapshot()
+        self.timestep.reset()
+
+    # --- Recording & Replay ---
+    def save_recording(self, event=None):
+        recording = self.recorder.recording if self.recorder is not None else self.last_recording
+        if recording is not None:
+            path = recording.save(time.strftime("brick_replay_%Y%m%d_%H%M%S.bbr"))
+            print(f"Saved replay to {path}")
+            if recording is self.last_recording and self.last_run is not None:
+                self.scores.attach_replay(*self.last_run, path)
+
+    def play_recording(self, recording):
+        """Plays a recorded game back on the canvas in real time."""
+        settings = recording.settings
+        self.temp_ball_speed = settings.get('ball_speed', 'Normal')
+        self.temp_paddle_size = settings.get('paddle_size', 'Normal')
+        self.temp_brick_color = settings.get('brick_color', 'Blue')
+        self.engine.configure(speed=SPEED_MULTIPLIERS.get(self.temp_ball_speed, 1.0),
+                              paddle_width=PADDLE_SIZES.get(self.temp_paddle_size, 100))
+        self.engine.reset(seed=recording.seed)
+        self.renderer.brick_color = BRICK_COLORS.get(self.temp_brick_color, '#203F8C')
+        self.renderer.setup_bricks()
+
+        self.replayer = Replayer(recording)
+        self.start_game()
+
+    def finish_replay(self):
+        recording = self.replayer.recording
+        self.replayer = None
+        if recording.final is not None:
+            matched = final_state(self.engine) == recording.final
+            print("Replay matches the recording" if matched else
+                  f"Replay diverged: recorded {recording.final}, got {final_state(self.engine)}")
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tkinter Brick Breaker")
+    parser.add_argument('--level', metavar='PATH', help='play a level file (see levels.py)')
+    parser.add_argument('--replay', metavar='PATH', help='play back a recorded game')
+    parser.add_argument('--demo', action='store_true', help='start a game on autopilot')
+    parser.add_argument('--connect', metavar='HOST:PORT',
+                        help='play on a session server (see server.py)')
+    args = parser.parse_args()
+
+    recording = Recording.load(args.replay) if args.replay else None
+    if recording is not None:
+        args.level = recording.settings.get('level') # Replays need their own level
+
     root = tk.Tk()
-    game = Game(root)
+    client = None
+    if args.connect:
+        host, port = args.connect.rsplit(':', 1)
+        client = NetClient(host, int(port))
+    game = Game(root, level_path=args.level, client=client)
+    if recording is not None:
+        game.play_recording(recording)
+    elif args.demo:
+        game.toggle_autopilot()
+        game.start_game()
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,135 @@
+# autopilot.py
+
+"""Autopilot paddle for demos and load testing.
+
+Instead of simulating ahead, the autopilot works out where the lead ball
+will cross the paddle's line in closed form: reflections off the side walls
+and the ceiling are unfolded into one straight line, and the landing x is
+folded back into the board. Bricks are ignored; whenever one (or the paddle)
+changes the ball's velocity the prediction is simply recomputed, so between
+bounces the autopilot costs a cache check per tick.
+
+It moves the paddle the way a player does, by holding an arrow key: the
+paddle accelerates through Engine.steer() to the same top speed, and the
+key is let go early enough to coast to a stop on the target.
+
+    python autopilot.py --games 1000      # headless games, as fast as possible
+"""
+
+import argparse
+import sys
+import time
+
+from constants import BALL_RADIUS, PADDLE_ACCEL, PHYSICS_HZ
+from engine import Engine, EVENT_GAME_OVER, EVENT_WON, EVENT_PADDLE
+from loop import physics_dt
+
+AIM_OFFSET = 0.25 # Share of the paddle width off centre to catch the ball with
+AIM_TOLERANCE = 5 # Close enough to the target to let go of the keys, px
+
+
+def fold(x, low, high):
+    """Maps a position on the unfolded line back between two walls."""
+    span = high - low
+    if span <= 0:
+        return low
+    u = (x - low) % (2 * span)
+    return low + (2 * span - u if u > span else u)
+
+
+def predict_landing(x, y, dx, dy, width, catch_y, r=BALL_RADIUS):
+    """Where a ball's centre crosses catch_y, bouncing off walls and ceiling.
+
+    Returns None if the ball is not moving vertically.
+    """
+    if dy > 0:
+        distance = catch_y - y
+    elif dy < 0:
+        distance = (y - r) + (catch_y - r) # Up to the ceiling and back down
+    else:
+        return None
+    ticks = distance / abs(dy)
+    return fold(x + dx * ticks, r, width - r)
+
+
+class Autopilot:
+    """Steers an engine's paddle towards the lead ball's predicted landing."""
+    def __init__(self, engine):
+        self.engine = engine
+        self.key = None # Lead ball state the cached target was computed for
+        self.target = None
+        self.side = 1 # Which side of the paddle to catch on, alternating
+
+    def aim(self):
+        """The paddle x-centre to head for, recomputed only on a new velocity."""
+        engine = self.engine
+        balls = engine.balls
+        key = (balls.version, balls.dx[0], balls.dy[0])
+        if key != self.key:
+            if self.key is not None and self.key[2] > 0 > key[2]:
+                self.side = -self.side # Bounced back up, most likely off the paddle
+            self.key = key
+            landing = predict_landing(balls.x[0], balls.y[0], balls.dx[0], balls.dy[0],
+                                      engine.width, engine.paddle.y - BALL_RADIUS)
+            if landing is not None:
+                # Catch it off centre so the bounce angle keeps changing
+                landing -= self.side * AIM_OFFSET * engine.paddle.width
+            self.target = landing
+        return self.target
+
+    def direction(self):
+        """The arrow key to hold this tick: -1 left, 1 right, 0 neither."""
+        target = self.aim()
+        if target is None:
+            return 0
+        paddle = self.engine.paddle
+        offset = target - paddle.center()
+        if PADDLE_ACCEL:
+            offset -= paddle.vx * abs(paddle.vx) / (2 * PADDLE_ACCEL) # Braking distance
+        if offset < -AIM_TOLERANCE:
+            return -1
+        if offset > AIM_TOLERANCE:
+            return 1
+        return 0
+
+    def press(self, dt):
+        """Steers the paddle for one step of dt ticks, for headless games."""
+        self.engine.steer(self.direction(), dt)
+
+
+def run_games(games, max_ticks, seed):
+    """Plays autopilot games back to back. Returns (wins, ticks, paddle hits)."""
+    dt = physics_dt()
+    wins = ticks = hits = 0
+    for game in range(games):
+        engine = Engine(seed=seed + game)
+        pilot = Autopilot(engine)
+        for _ in range(max_ticks):
+            pilot.press(dt)
+            events = engine.step(dt)
+            ticks += 1
+            if events & EVENT_PADDLE:
+                hits += 1
+            if events & (EVENT_GAME_OVER | EVENT_WON):
+                wins += not events & EVENT_GAME_OVER
+                break
+    return wins, ticks, hits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless autopilot games.")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--max-seconds', type=float, default=600)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    wins, ticks, hits = run_games(args.games, int(args.max_seconds * PHYSICS_HZ), args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"{args.games} games, {wins} won, {hits} paddle hits, "
+          f"{ticks} ticks in {elapsed:.2f} s ({ticks / elapsed:.0f} ticks/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+# batch.py
+
+"""Vectorised simulator that steps N independent games at once.
+
+Each game follows the same rules as engine.Engine.step() on a full wall of
+normal bricks. Collisions are swept like Engine's: every ball moves to its
+earliest contact with a wall, the paddle or a brick, reflects off the
+contact normal and carries on with the rest of its step, up to
+MAX_CONTACTS times. The paddle applies its hit-ratio deflection and
+BASE_SPEED * 2 speed clamp, which the next serve inherits. A life is lost
+at the bottom edge.
+
+The state of all games lives in NumPy arrays, so one call to step()
+advances the whole batch. The sweep functions below are collision.py's,
+written out for arrays of balls and boxes. They do the same arithmetic in
+the same order, so a batch game plays out exactly like an Engine game with
+the same serve and paddle moves. Requires NumPy.
+"""
+
+import numpy as np
+
+from constants import (
+    WINDOW_WIDTH, WINDOW_HEIGHT, MAX_LIVES,
+    BASE_SPEED, BALL_RADIUS, PADDLE_SPEED, SERVE_SPREAD,
+    PADDLE_WIDTH, PADDLE_HEIGHT,
+    BRICK_ROWS, BRICK_COLS, BRICK_WIDTH, BRICK_HEIGHT, BRICK_PADDING,
+    BRICK_OFFSET_TOP, BRICK_OFFSET_LEFT, BRICK_NORMAL, BRICK_SCORES,
+)
+from collision import reflect # Plain arithmetic, works on arrays as it is
+from engine import MAX_CONTACTS, HIT_WALL, HIT_DRAIN, HIT_PADDLE
+
+NO_HIT = -4 # Alongside engine's HIT_* values; brick indices are >= 0
+
+
+def sweep_walls(cx, cy, r, mx, my, width, height):
+    """collision.sweep_circle_walls for arrays. t is inf where nothing is hit."""
+    best_t = np.full(cx.shape, np.inf)
+    best_nx = np.zeros(cx.shape)
+    best_ny = np.zeros(cx.shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        walls = ((mx < 0, (r - cx) / mx, 1.0, 0.0),
+                 (mx > 0, (width - r - cx) / mx, -1.0, 0.0),
+                 (my < 0, (r - cy) / my, 0.0, 1.0),
+                 (my > 0, (height - r - cy) / my, 0.0, -1.0))
+    for moving, t, nx, ny in walls:
+        t = np.maximum(t, 0.0) # Already past the wall: bounce straight away
+        earlier = moving & (t <= 1) & (t < best_t)
+        best_t[earlier] = t[earlier]
+        best_nx[earlier] = nx
+        best_ny[earlier] = ny
+    return best_t, best_nx, best_ny
+
+
+def sweep_corners(cx, cy, r, mx, my, qx, qy):
+    """collision._sweep_corner for arrays. t is inf where there is no contact."""
+    fx = cx - qx
+    fy = cy - qy
+    a = mx * mx + my * my
+    b = 2 * (fx * mx + fy * my)
+    c = fx * fx + fy * fy - r * r
+    disc = b * b - 4 * a * c
+    hit = (disc >= 0) & (a != 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (-b - np.power(np.where(hit, disc, 0.0), 0.5)) / (2 * a)
+    hit &= (0 <= t) & (t <= 1)
+    return np.where(hit, t, np.inf), (fx + mx * t) / r, (fy + my * t) / r
+
+
+def inside_normals(cx, cy, x1, y1, x2, y2):
+    """collision._inside_normal for arrays, with its tie-breaking order."""
+    # min() over (gap, nx, ny) tuples prefers left, then top, bottom, right
+    gaps = np.stack((cx - x1, cy - y1, y2 - cy, x2 - cx))
+    face = np.argmin(gaps, axis=0)
+    return np.array((-1.0, 0.0, 0.0, 1.0))[face], np.array((0.0, -1.0, 1.0, 0.0))[face]
+
+
+def sweep_boxes(cx, cy, r, mx, my, x1, y1, x2, y2):
+    """collision.sweep_circle_aabb for arrays of balls, each against its own box.
+
+    Returns (t, nx, ny) arrays, with t = inf where there is no contact.
+    """
+    t = np.full(cx.shape, np.inf)
+    nx = np.zeros(cx.shape)
+    ny = np.zeros(cx.shape)
+
+    # Already touching: push out along the normal from the nearest point
+    px = np.minimum(np.maximum(cx, x1), x2)
+    py = np.minimum(np.maximum(cy, y1), y2)
+    ox = cx - px
+    oy = cy - py
+    dist_sq = ox * ox + oy * oy
+    touching = dist_sq <= r * r
+    if touching.any():
+        dist = np.power(dist_sq, 0.5)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            touch_nx = ox / dist
+            touch_ny = oy / dist
+        inside = touching & (dist_sq == 0)
+        if inside.any():
+            inside_nx, inside_ny = inside_normals(cx, cy, x1, y1, x2, y2)
+            touch_nx = np.where(inside, inside_nx, touch_nx)
+            touch_ny = np.where(inside, inside_ny, touch_ny)
+        approaching = touching & (mx * touch_nx + my * touch_ny < 0)
+        t[approaching] = 0.0
+        nx[approaching] = touch_nx[approaching]
+        ny[approaching] = touch_ny[approaching]
+
+    # Slab test against the box grown by r on every side
+    t_enter = np.zeros(cx.shape)
+    t_exit = np.ones(cx.shape)
+    enter_nx = np.zeros(cx.shape)
+    enter_ny = np.zeros(cx.shape)
+    miss = touching.copy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for m, c, low, high, x_axis in ((mx, cx, x1, x2, True), (my, cy, y1, y2, False)):
+            ta = (low - r - c) / m
+            tb = (high + r - c) / m
+            ta, tb = np.minimum(ta, tb), np.maximum(ta, tb)
+            moving = m != 0
+            entered = moving & (ta > t_enter)
+            t_enter = np.where(entered, ta, t_enter)
+            normal = np.where(m > 0, -1.0, 1.0)
+            enter_nx = np.where(entered, normal if x_axis else 0.0, enter_nx)
+            enter_ny = np.where(entered, 0.0 if x_axis else normal, enter_ny)
+            t_exit = np.where(moving, np.minimum(t_exit, tb), t_exit)
+            miss |= ~moving & ((c < low - r) | (c > high + r))
+    miss |= t_enter > t_exit
+    if miss.all():
+        return t, nx, ny
+
+    # A face hit unless the entry point is off a corner of the real box
+    hx = cx + mx * t_enter
+    hy = cy + my * t_enter
+    off_x = (hx < x1) | (hx > x2)
+    off_y = (hy < y1) | (hy > y2)
+    from_inside = (enter_nx == 0) & (enter_ny == 0) # Beside a rounded corner
+    face = ~miss & ~from_inside & ~(off_x & off_y)
+    t[face] = t_enter[face]
+    nx[face] = enter_nx[face]
+    ny[face] = enter_ny[face]
+
+    corner = ~miss & ~face
+    if corner.any():
+        qx = np.where(from_inside, px, np.where(hx < x1, x1, x2))
+        qy = np.where(from_inside, py, np.where(hy < y1, y1, y2))
+        corner_t, corner_nx, corner_ny = sweep_corners(cx, cy, r, mx, my, qx, qy)
+        t[corner] = corner_t[corner]
+        nx[corner] = corner_nx[corner]
+        ny[corner] = corner_ny[corner]
+    return t, nx, ny
+
+
+class BatchEngine:
+    """N games held in struct-of-arrays form, advanced together by step()."""
+    def __init__(self, n, width=WINDOW_WIDTH, height=WINDOW_HEIGHT,
+                 rows=BRICK_ROWS, cols=BRICK_COLS,
+                 paddle_width=PADDLE_WIDTH, speed=1.0, seed=None):
+        self.n = n
+        self.width = width
+        self.height = height
+        self.rows = rows
+        self.cols = cols
+        self.paddle_width = paddle_width
+        self.paddle_y = height - 30
+        self.speed = speed
+        self.rng = np.random.default_rng(seed) # Turns each game's first serve
+
+        self.serve_dx = np.zeros(n) # Drifts with paddle hits, like Engine's
+        self.serve_dy = np.zeros(n)
+        self.ball_x = np.zeros(n)
+        self.ball_y = np.zeros(n)
+        self.ball_dx = np.zeros(n)
+        self.ball_dy = np.zeros(n)
+        self.paddle_x = np.zeros(n)
+        self.lives = np.zeros(n, dtype=np.int8)
+        self.score = np.zeros(n, dtype=np.int32)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.alive = np.zeros((n, rows, cols), dtype=bool)
+        self.bricks_left = np.zeros(n, dtype=np.int32)
+        self.done = np.zeros(n, dtype=bool)
+        self.won = np.zeros(n, dtype=bool)
+
+        self.reset()
+
+    # --- Setup ---
+
+    def reset(self, mask=None):
+        """Starts fresh games wherever mask is True (every game by default)."""
+        if mask is None:
+            mask = np.ones(self.n, dtype=bool)
+        self.lives[mask] = MAX_LIVES
+        self.score[mask] = 0
+        self.ticks[mask] = 0
+        self.alive[mask] = True
+        self.bricks_left[mask] = self.rows * self.cols
+        self.done[mask] = False
+        self.won[mask] = False
+        # Engine.reset_serve() for every game, each at its own angle
+        angle = self.rng.uniform(-SERVE_SPREAD, SERVE_SPREAD, int(np.count_nonzero(mask)))
+        speed = BASE_SPEED * self.speed
+        self.serve_dx[mask] = speed * (np.cos(angle) + np.sin(angle))
+        self.serve_dy[mask] = speed * (np.sin(angle) - np.cos(angle))
+        self.reset_ball(mask)
+
+    def reset_ball(self, mask):
+        self.ball_x[mask] = self.width // 2
+        self.ball_y[mask] = self.height // 2
+        self.ball_dx[mask] = self.serve_dx[mask]
+        self.ball_dy[mask] = self.serve_dy[mask]
+        self.paddle_x[mask] = (self.width - self.paddle_width) // 2
+
+    # --- Rules ---
+
+    def move_paddles(self, actions):
+        """Moves each paddle by actions[i] * PADDLE_SPEED if it stays on screen."""
+        new_x1 = self.paddle_x + np.asarray(actions) * PADDLE_SPEED
+        ok = (new_x1 >= 0) & (new_x1 + self.paddle_width <= self.width) & ~self.done
+        self.paddle_x[ok] = new_x1[ok]
+
+    def step(self, actions=None, dt=1.0):
+        """Advances every unfinished game by dt ticks. Returns the done mask."""
+        if actions is not None:
+            self.move_paddles(actions)
+
+        active = ~self.done
+        self.ticks[active] += 1
+        drained = np.zeros(self.n, dtype=bool)
+        games = np.flatnonzero(active)
+        remaining = np.ones(len(games))
+        for _ in range(MAX_CONTACTS):
+            if not len(games):
+                break
+            x = self.ball_x[games]
+            y = self.ball_y[games]
+            dx = self.ball_dx[games]
+            dy = self.ball_dy[games]
+            move_x = dx * dt * remaining
+            move_y = dy * dt * remaining
+            t, what, nx, ny = self._first_contact(games, x, y, move_x, move_y)
+            self.ball_x[games] = x + move_x * t
+            self.ball_y[games] = y + move_y * t
+            remaining *= 1 - t
+
+            wall = (what == HIT_WALL) | (what >= 0)
+            dx, dy = np.where(wall, reflect(dx, dy, nx, ny), (dx, dy))
+            paddle = what == HIT_PADDLE
+            if paddle.any():
+                dx[paddle], dy[paddle] = self._paddle_bounce(
+                    games[paddle], self.ball_x[games[paddle]],
+                    dx[paddle], dy[paddle], nx[paddle], ny[paddle])
+            brick = what >= 0
+            if brick.any():
+                self._break_bricks(games[brick], what[brick])
+            self.ball_dx[games] = dx
+            self.ball_dy[games] = dy
+
+            drain = what == HIT_DRAIN
+            if drain.any():
+                drained[games[drain]] = True
+                self._lose_lives(games[drain])
+            going = (what != NO_HIT) & ~drain
+            games = games[going]
+            remaining = remaining[going]
+
+        # A game that lost a life this step is checked on its next one, as in Engine
+        cleared = active & ~drained & (self.bricks_left == 0)
+        self.won[cleared] = True
+        self.done[cleared] = True
+        return self.done
+
+    def _first_contact(self, games, x, y, move_x, move_y):
+        """Engine.first_contact for the given games: (t, what, nx, ny) arrays."""
+        r = BALL_RADIUS
+        t, nx, ny = sweep_walls(x, y, r, move_x, move_y, self.width, self.height)
+        what = np.where(ny < 0, HIT_DRAIN, HIT_WALL)
+        what[np.isinf(t)] = NO_HIT
+        t[np.isinf(t)] = 1.0
+
+        # Box around the whole move: cheap rejects before any exact sweep
+        left = np.minimum(x, x + move_x) - r
+        right = np.maximum(x, x + move_x) + r
+        top = np.minimum(y, y + move_y) - r
+        bottom = np.maximum(y, y + move_y) + r
+
+        paddle_x = self.paddle_x[games]
+        near = ((bottom >= self.paddle_y) & (top <= self.paddle_y + PADDLE_HEIGHT) &
+                (right >= paddle_x) & (left <= paddle_x + self.paddle_width))
+        if near.any():
+            i = np.flatnonzero(near)
+            hit_t, hit_nx, hit_ny = sweep_boxes(
+                x[i], y[i], r, move_x[i], move_y[i], paddle_x[i],
+                np.full(len(i), float(self.paddle_y)), paddle_x[i] + self.paddle_width,
+                np.full(len(i), float(self.paddle_y + PADDLE_HEIGHT)))
+            self._take_earlier(i, hit_t, HIT_PADDLE, hit_nx, hit_ny, t, what, nx, ny)
+
+        # Only bricks in the cells the whole move passes through, lowest index first
+        stride_x = BRICK_WIDTH + BRICK_PADDING
+        stride_y = BRICK_HEIGHT + BRICK_PADDING
+        col0 = np.maximum(((left - BRICK_OFFSET_LEFT) // stride_x).astype(np.int64), 0)
+        col1 = np.minimum(((right - BRICK_OFFSET_LEFT) // stride_x).astype(np.int64),
+                          self.cols - 1)
+        row0 = np.maximum(((top - BRICK_OFFSET_TOP) // stride_y).astype(np.int64), 0)
+        row1 = np.minimum(((bottom - BRICK_OFFSET_TOP) // stride_y).astype(np.int64),
+                          self.rows - 1)
+        for row_step in range(int(np.max(row1 - row0, initial=-1)) + 1):
+            for col_step in range(int(np.max(col1 - col0, initial=-1)) + 1):
+                row = row0 + row_step
+                col = col0 + col_step
+                inside = (row <= row1) & (col <= col1)
+                i = np.flatnonzero(inside)
+                i = i[self.alive[games[i], row[i], col[i]]]
+                if not len(i):
+                    continue
+                x1 = BRICK_OFFSET_LEFT + col[i] * stride_x
+                y1 = BRICK_OFFSET_TOP + row[i] * stride_y
+                hit_t, hit_nx, hit_ny = sweep_boxes(
+                    x[i], y[i], r, move_x[i], move_y[i],
+                    x1, y1, x1 + BRICK_WIDTH, y1 + BRICK_HEIGHT)
+                self._take_earlier(i, hit_t, row[i] * self.cols + col[i],
+                                   hit_nx, hit_ny, t, what, nx, ny)
+        return t, what, nx, ny
+
+    @staticmethod
+    def _take_earlier(i, hit_t, hit_what, hit_nx, hit_ny, t, what, nx, ny):
+        """Keeps contacts strictly earlier than the best so far, like Engine."""
+        earlier = hit_t < t[i]
+        j = i[earlier]
+        t[j] = hit_t[earlier]
+        what[j] = hit_what[earlier] if np.ndim(hit_what) else hit_what
+        nx[j] = hit_nx[earlier]
+        ny[j] = hit_ny[earlier]
+
+    def _paddle_bounce(self, games, x, dx, dy, nx, ny):
+        """Engine.paddle_bounce for the given games; updates their serves too."""
+        side = ny >= 0 # Clipped the paddle's side or underside: plain bounce
+        side_dx, side_dy = reflect(dx, dy, nx, ny)
+        dy = -np.abs(dy)
+
+        # Same hit-ratio deflection as Engine.paddle_bounce
+        paddle_center = self.paddle_x[games] + self.paddle_width / 2
+        hit_ratio = (x - paddle_center) / (self.paddle_width / 2)
+        dx = dx + hit_ratio * 1
+        top = games[~side]
+        self.serve_dx[top] += hit_ratio[~side] * 1
+
+        # Ensure speed does not get excessive
+        max_speed = BASE_SPEED * 2
+        current_speed = np.power(dx**2 + dy**2, 0.5)
+        clamped = current_speed > max_speed
+        scale = np.where(clamped, max_speed / current_speed, 1.0)
+        dx = np.where(clamped, dx * scale, dx)
+        dy = np.where(clamped, dy * scale, dy)
+        # A clamped bounce becomes the serve velocity, as in Engine
+        serve = clamped & ~side
+        self.serve_dx[games[serve]] = dx[serve]
+        self.serve_dy[games[serve]] = dy[serve]
+        return np.where(side, side_dx, dx), np.where(side, side_dy, dy)
+
+    def _break_bricks(self, games, indices):
+        rows, cols = np.divmod(indices, self.cols)
+        self.alive[games, rows, cols] = False
+        self.score[games] += BRICK_SCORES[BRICK_NORMAL]
+        self.bricks_left[games] -= 1
+
+    def _lose_lives(self, games):
+        self.lives[games] -= 1
+        over = self.lives[games] <= 0
+        self.done[games[over]] = True
+        serve = np.zeros(self.n, dtype=bool)
+        serve[games[~over]] = True
+        self.reset_ball(serve)
@@ -0,0 +1,195 @@
+# bench.py
+
+"""Benchmarks for the headless engine.
+
+Plays seeded, scripted games for each board size and ball speed and reports
+per-step latency percentiles, steps per second, brick setup time and peak
+memory as JSON. Nothing here needs a display, so it runs on any CI box:
+
+    python bench.py --output results.json
+    python bench.py --compare results.json    # against an earlier run
+"""
+
+import argparse
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from array import array
+
+from constants import PADDLE_SPEED, BRICK_ROWS, BRICK_COLS
+from engine import Engine, board_size, EVENT_GAME_OVER, EVENT_WON
+from loop import physics_dt
+
+DEFAULT_SIZES = f'{BRICK_ROWS}x{BRICK_COLS},10x20,25x50,50x50,100x100'
+DEFAULT_SPEEDS = '0.5,1,1.5,3'
+PHYSICS_DT = physics_dt() # Same step size as the Tk game
+
+
+def make_engine(rows, cols, speed, seed):
+    width, height = board_size(rows, cols)
+    return Engine(width=width, height=height, rows=rows, cols=cols, speed=speed, seed=seed)
+
+
+def scripted_paddle(engine, rng, state):
+    """Follows the ball with a seeded aiming offset that changes now and then."""
+    if rng.random() < 0.02:
+        state[0] = rng.uniform(-0.4, 0.4) * engine.paddle.width
+    target = engine.ball_x + state[0]
+    center = engine.paddle.center()
+    if target < center - PADDLE_SPEED / 2:
+        engine.move_paddle(-PADDLE_SPEED)
+    elif target > center + PADDLE_SPEED / 2:
+        engine.move_paddle(PADDLE_SPEED)
+
+
+def run_game(rows, cols, speed, ticks, seed):
+    """Plays `ticks` steps (restarting finished games) and times each one."""
+    rng = random.Random(seed)
+    state = [0.0]
+    engine = make_engine(rows, cols, speed, seed)
+    timings = array('d', bytes(8 * ticks))
+    clock = time.perf_counter
+    games = 1
+
+    start = clock()
+    for tick in range(ticks):
+        t0 = clock()
+        scripted_paddle(engine, rng, state)
+        events = engine.step(PHYSICS_DT)
+        timings[tick] = clock() - t0
+        if events & (EVENT_GAME_OVER | EVENT_WON):
+            engine.reset()
+            games += 1
+    elapsed = clock() - start
+    return timings, elapsed, games, engine.score
+
+
+def percentile(sorted_values, fraction):
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def measure_setup(rows, cols, repeats=5, seed=1):
+    """Best-of-N seconds to build an engine, i.e. lay out the brick wall."""
+    best = float('inf')
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        make_engine(rows, cols, 1.0, seed)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def measure_memory(rows, cols, speed, ticks, seed):
+    """Peak traced allocation while building an engine and playing on it."""
+    tracemalloc.start()
+    run_game(rows, cols, speed, ticks, seed)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def bench_case(rows, cols, speed, ticks, seed):
+    timings, elapsed, games, score = run_game(rows, cols, speed, ticks, seed)
+    ordered = sorted(timings)
+    to_us = 1e6
+    return {
+        'rows': rows,
+        'cols': cols,
+        'bricks': rows * cols,
+        'speed': speed,
+        'ticks': ticks,
+        'games': games,
+        'steps_per_sec': ticks / elapsed,
+        'step_us': {
+            'p50': percentile(ordered, 0.50) * to_us,
+            'p90': percentile(ordered, 0.90) * to_us,
+            'p99': percentile(ordered, 0.99) * to_us,
+            'max': ordered[-1] * to_us,
+            'mean': elapsed / ticks * to_us,
+        },
+        'setup_ms': measure_setup(rows, cols, seed=seed) * 1e3,
+        'peak_memory_kb': measure_memory(rows, cols, speed, min(ticks, 2000), seed) / 1024,
+        'last_score': score,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_sizes(text):
+    sizes = []
+    for item in text.split(','):
+        rows, cols = item.lower().split('x')
+        sizes.append((int(rows), int(cols)))
+    return sizes
+
+
+def case_key(case):
+    return (case['rows'], case['cols'], case['speed'])
+
+
+def compare(results, baseline):
+    """Prints how each case moved relative to a previous results file."""
+    old_cases = {case_key(case): case for case in baseline['cases']}
+    print(f"{'board':>9} {'speed':>5} {'steps/s':>12} {'p50':>8} {'p99':>8}")
+    for case in results['cases']:
+        old = old_cases.get(case_key(case))
+        if old is None:
+            continue
+        print(f"{case['rows']:>4}x{case['cols']:<4} {case['speed']:>5} "
+              f"{case['steps_per_sec'] / old['steps_per_sec']:>11.2f}x "
+              f"{case['step_us']['p50'] / old['step_us']['p50']:>7.2f}x "
+              f"{case['step_us']['p99'] / old['step_us']['p99']:>7.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help='comma-separated ROWSxCOLS boards (default: %(default)s)')
+    parser.add_argument('--speeds', default=DEFAULT_SPEEDS,
+                        help='comma-separated speed multipliers (default: %(default)s)')
+    parser.add_argument('--ticks', type=int, default=20000, help='physics steps per case')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write JSON results here (default: stdout)')
+    parser.add_argument('--compare', help='earlier JSON results to compare against')
+    args = parser.parse_args(argv)
+
+    cases = []
+    for rows, cols in parse_sizes(args.sizes):
+        for speed in (float(s) for s in args.speeds.split(',')):
+            case = bench_case(rows, cols, speed, args.ticks, args.seed)
+            cases.append(case)
+            print(f"{rows}x{cols} speed {speed}: {case['steps_per_sec']:.0f} steps/s, "
+                  f"p99 {case['step_us']['p99']:.1f} us", file=sys.stderr)
+
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': args.seed,
+        'physics_dt': PHYSICS_DT,
+        'cases': cases,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
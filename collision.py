@@ -0,0 +1,134 @@
+# collision.py
+
+"""Swept (continuous) collision tests for the ball.
+
+The ball is a circle moving along a straight line during a step. Instead of
+checking for overlap only where the step ends, these functions return the
+time of impact t (0..1, as a fraction of the move) and the surface normal at
+the contact point, so a fast ball can never skip past the paddle or tunnel
+through a thin brick row.
+"""
+
+
+def sweep_circle_aabb(cx, cy, r, mx, my, x1, y1, x2, y2):
+    """Sweeps a circle of radius r at (cx, cy) by (mx, my) against a box.
+
+    Returns (t, nx, ny) for the first contact, or None. Contacts where the
+    circle is already moving away from the box are ignored, so a ball that
+    has just bounced off a surface is not caught by it again.
+    """
+    # Already touching: push out along the normal from the nearest point
+    px = min(max(cx, x1), x2)
+    py = min(max(cy, y1), y2)
+    ox = cx - px
+    oy = cy - py
+    dist_sq = ox * ox + oy * oy
+    if dist_sq <= r * r:
+        if dist_sq > 0:
+            dist = dist_sq ** 0.5
+            nx, ny = ox / dist, oy / dist
+        else:
+            nx, ny = _inside_normal(cx, cy, x1, y1, x2, y2)
+        if mx * nx + my * ny < 0:
+            return 0.0, nx, ny
+        return None
+
+    # Slab test against the box grown by r on every side
+    t_enter = 0.0
+    t_exit = 1.0
+    nx = ny = 0.0
+    if mx != 0:
+        ta = (x1 - r - cx) / mx
+        tb = (x2 + r - cx) / mx
+        if ta > tb:
+            ta, tb = tb, ta
+        if ta > t_enter:
+            t_enter = ta
+            nx, ny = (-1.0 if mx > 0 else 1.0), 0.0
+        t_exit = min(t_exit, tb)
+    elif cx < x1 - r or cx > x2 + r:
+        return None
+    if my != 0:
+        ta = (y1 - r - cy) / my
+        tb = (y2 + r - cy) / my
+        if ta > tb:
+            ta, tb = tb, ta
+        if ta > t_enter:
+            t_enter = ta
+            nx, ny = 0.0, (-1.0 if my > 0 else 1.0)
+        t_exit = min(t_exit, tb)
+    elif cy < y1 - r or cy > y2 + r:
+        return None
+    if t_enter > t_exit:
+        return None
+    if nx == 0 and ny == 0:
+        # Starts inside the grown box but beside a rounded corner
+        return _sweep_corner(cx, cy, r, mx, my, px, py)
+
+    # A face hit unless the entry point is off a corner of the real box
+    hx = cx + mx * t_enter
+    hy = cy + my * t_enter
+    corner_x = x1 if hx < x1 else x2 if hx > x2 else None
+    corner_y = y1 if hy < y1 else y2 if hy > y2 else None
+    if corner_x is None or corner_y is None:
+        return t_enter, nx, ny
+    return _sweep_corner(cx, cy, r, mx, my, corner_x, corner_y)
+
+
+def _sweep_corner(cx, cy, r, mx, my, qx, qy):
+    """Time of impact between the moving circle and a box corner at (qx, qy)."""
+    fx = cx - qx
+    fy = cy - qy
+    a = mx * mx + my * my
+    b = 2 * (fx * mx + fy * my)
+    c = fx * fx + fy * fy - r * r
+    disc = b * b - 4 * a * c
+    if disc < 0 or a == 0:
+        return None
+    t = (-b - disc ** 0.5) / (2 * a)
+    if not 0 <= t <= 1:
+        return None
+    nx = (fx + mx * t) / r
+    ny = (fy + my * t) / r
+    return t, nx, ny
+
+
+def _inside_normal(cx, cy, x1, y1, x2, y2):
+    """Normal of the nearest face for a circle centre inside the box."""
+    gaps = ((cx - x1, -1.0, 0.0), (x2 - cx, 1.0, 0.0),
+            (cy - y1, 0.0, -1.0), (y2 - cy, 0.0, 1.0))
+    _, nx, ny = min(gaps)
+    return nx, ny
+
+
+def sweep_circle_walls(cx, cy, r, mx, my, width, height):
+    """First contact of the moving circle with the window edges.
+
+    Returns (t, nx, ny) or None. The bottom edge reports ny == -1 like the
+    top wall would, and callers treat it as the ball draining.
+    """
+    best = None
+    if mx < 0:
+        best = _earliest(best, (r - cx) / mx, 1.0, 0.0)
+    elif mx > 0:
+        best = _earliest(best, (width - r - cx) / mx, -1.0, 0.0)
+    if my < 0:
+        best = _earliest(best, (r - cy) / my, 0.0, 1.0)
+    elif my > 0:
+        best = _earliest(best, (height - r - cy) / my, 0.0, -1.0)
+    return best
+
+
+def _earliest(best, t, nx, ny):
+    if t > 1:
+        return best
+    t = max(t, 0.0) # Already past the wall: bounce straight away
+    if best is None or t < best[0]:
+        return t, nx, ny
+    return best
+
+
+def reflect(vx, vy, nx, ny):
+    """Mirrors a velocity about a unit surface normal."""
+    dot = vx * nx + vy * ny
+    return vx - 2 * dot * nx, vy - 2 * dot * ny
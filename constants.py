@@ -0,0 +1,95 @@
+# constants.py
+
+"""Shared constants for the Tk view and the headless engine."""
+
+# --- Game Constants ---
+WINDOW_WIDTH = 600
+WINDOW_HEIGHT = 400
+MAX_LIVES = 3 
+
+# --- Colors ---
+PADDLE_COLOR = "#B7CD28"
+PADDLE_EDGE_COLOR = "#91A921" # Slightly darker color for the rounded edges
+BALL_COLOR = "#E79625"
+BACKGROUND_COLOR = "#597C9F"
+BRICK_COLOR = "#203F8C"
+FRONTPAGE_BG = "#97869D"
+FRONTPAGE_PANEL = '#3D0070'
+BUTTON_COLOR = '#FFD966'
+BUTTON_HOVER = '#FFB347'
+
+# --- Ball & Movement Constants ---
+BASE_SPEED = 4
+BALL_RADIUS = 8
+BALL_START_DX = BASE_SPEED
+BALL_START_DY = -BASE_SPEED
+PADDLE_SPEED = 15 # Top paddle speed while an arrow key is held, px per tick
+PADDLE_ACCEL = 5 # Speed gained or lost per tick; 0 for instant starts and stops
+MAX_BALLS = 512 # Split bricks stop adding balls past this
+SPLIT_ANGLE = 0.35 # Radians each split-off ball turns away from the original
+SERVE_SPREAD = 0.25 # Radians the seed may turn a game's first serve either way
+
+# --- Game Objects Constants ---
+PADDLE_WIDTH = 100
+PADDLE_HEIGHT = 15
+PADDLE_START_X = (WINDOW_WIDTH - PADDLE_WIDTH) // 2
+PADDLE_START_Y = WINDOW_HEIGHT - 30
+PADDLE_CORNER_RADIUS = 7 # Half of PADDLE_HEIGHT for smooth rounded ends
+
+BALL_START_X = WINDOW_WIDTH // 2
+BALL_START_Y = WINDOW_HEIGHT // 2
+
+# --- Brick Constants ---
+BRICK_ROWS = 5
+BRICK_COLS = 10
+BRICK_WIDTH = 50
+BRICK_HEIGHT = 15
+BRICK_PADDING = 10
+BRICK_OFFSET_TOP = 40
+BRICK_OFFSET_LEFT = 35
+
+# --- Brick Types ---
+# Level cells hold a type number; the tuples below are indexed by it
+BRICK_EMPTY = 0
+BRICK_NORMAL = 1
+BRICK_STRONG = 2
+BRICK_TOUGH = 3
+BRICK_STEEL = 4
+BRICK_SPLIT = 5 # Splits the ball that breaks it into three
+BRICK_HITS = (0, 1, 2, 3, 0, 1) # Hits needed to break; 0 means indestructible
+BRICK_SCORES = (0, 1, 2, 3, 0, 1) # Points for breaking one
+BRICK_TYPE_COLORS = (None, None, '#5B3A9E', '#9E3A3A', '#8A8F99', '#E0B020') # None: settings colour
+BRICK_DAMAGED_OUTLINE = '#FFFFFF'
+
+# --- Timing Constants ---
+TICK_SECONDS = 0.030 # Ball speeds are in pixels per tick of the original 30 ms loop
+PHYSICS_HZ = 120 # Fixed physics rate
+MAX_SUBSTEPS = 8 # Catch-up cap so a long stall cannot freeze the game
+RENDER_INTERVAL_MS = 16 # Roughly one redraw per 60 Hz display refresh
+COUNTDOWN_SECONDS = 1 # Per number of the resume countdown
+LIFE_LOST_SECONDS = 2 # Freeze while the lost-life message shows
+REWIND_SECONDS = 10 # Game time kept for rewinding
+
+# --- Effects ---
+PARTICLE_BUDGET = 256 # Canvas items in the particle pool, the most ever alive
+PARTICLES_PER_BRICK = 8
+PARTICLE_LIFE = 0.6 # s
+PARTICLE_SPEED = 180 # px/s
+PARTICLE_GRAVITY = 700 # px/s^2
+PARTICLE_SIZE = 4 # px
+MAX_FRAME_SECONDS = 0.1 # Longest frame gap effects animate across
+
+# --- Lag Handling ---
+# Lag is how late a frame's after() callback arrives. Physics always catches
+# up; only drawing is shed while the event loop is behind.
+LAG_SKIP_RENDER = 0.050 # A frame this late (s) skips its redraw
+MAX_SKIPPED_RENDERS = 3 # But never more frames in a row than this
+LAG_DEGRADE = 0.100 # Average lag (s) that drops decorative drawing
+LAG_RECOVER = 0.020 # Average lag (s) that brings it back
+LAG_SMOOTHING = 0.1 # Weight of the newest frame in the average
+REWIND_STEP_SECONDS = 2 # How far back one press of Backspace goes
+
+# --- Settings Choices ---
+SPEED_MULTIPLIERS = {'Slow': 0.5, 'Normal': 1.0, 'Fast': 1.5}
+PADDLE_SIZES = {'Small': 60, 'Normal': 100, 'Large': 140}
+BRICK_COLORS = {'Blue': '#203F8C', 'Red': '#FF4C4C', 'Green': '#28B78F'}
@@ -0,0 +1,108 @@
+# effects.py
+
+"""Pooled particle bursts for broken bricks.
+
+All particle items are created once, hidden, when the pool is made. A burst
+takes free items, recolours and shows them; a particle that burns out is
+hidden again and its item goes back to the free end of the pool. Particle
+state lives in flat arrays with the live particles packed at the front, so
+an update is one pass over at most `budget` particles and queues one coords
+command each into the renderer's frame script. However many bricks break at
+once, a frame never touches more than `budget` items.
+"""
+
+import math
+import random
+import time
+from array import array
+
+from constants import (
+    PARTICLE_BUDGET, PARTICLES_PER_BRICK, PARTICLE_LIFE,
+    PARTICLE_SPEED, PARTICLE_GRAVITY, PARTICLE_SIZE, MAX_FRAME_SECONDS,
+)
+
+
+class ParticlePool:
+    """A fixed number of canvas squares reused as short-lived particles."""
+    def __init__(self, renderer, budget=PARTICLE_BUDGET, clock=time.monotonic):
+        self.renderer = renderer
+        self.budget = budget
+        self.clock = clock
+        self.rng = random.Random() # Looks only; never touches the game's seed
+        self.last = None # Clock at the previous update
+
+        canvas = renderer.canvas
+        creates = ' '.join(f'[{renderer.path} create rectangle 0 0 0 0 -width 0 '
+                           f'-state hidden -tags particle]' for _ in range(budget))
+        ids = canvas.tk.splitlist(canvas.tk.eval('list ' + creates)) if budget else ()
+        self.items = array('l', (int(item) for item in ids))
+
+        # Live particles are slots 0 .. count-1, in board coordinates
+        self.count = 0
+        self.x = array('d', bytes(8 * budget))
+        self.y = array('d', bytes(8 * budget))
+        self.vx = array('d', bytes(8 * budget))
+        self.vy = array('d', bytes(8 * budget))
+        self.life = array('d', bytes(8 * budget)) # Seconds left
+
+    def burst(self, x, y, color, amount=PARTICLES_PER_BRICK):
+        """Throws up to `amount` particles from x, y; fewer if the pool is busy."""
+        rng = self.rng
+        renderer = self.renderer
+        for _ in range(min(amount, self.budget - self.count)):
+            slot = self.count
+            self.count += 1
+            angle = rng.uniform(0.0, 2 * math.pi)
+            speed = rng.uniform(0.3, 1.0) * PARTICLE_SPEED
+            self.x[slot] = x
+            self.y[slot] = y
+            self.vx[slot] = speed * math.cos(angle)
+            self.vy[slot] = speed * math.sin(angle) - PARTICLE_SPEED / 2 # Pop upwards
+            self.life[slot] = PARTICLE_LIFE * rng.uniform(0.6, 1.0)
+            renderer.queue('itemconfigure', self.items[slot], '-fill', color,
+                           '-state', 'normal')
+
+    def update(self):
+        """Moves every live particle by the time since the last update."""
+        now = self.clock()
+        elapsed = 0.0 if self.last is None else min(now - self.last, MAX_FRAME_SECONDS)
+        self.last = now
+        if not self.count:
+            return
+
+        renderer = self.renderer
+        view_x = renderer.view_x
+        view_y = renderer.view_y
+        x, y, vx, vy, life, items = self.x, self.y, self.vx, self.vy, self.life, self.items
+        half = PARTICLE_SIZE / 2
+        slot = 0
+        while slot < self.count:
+            life[slot] -= elapsed
+            if life[slot] <= 0:
+                self.expire(slot)
+                continue # The last live particle moved into this slot
+            vy[slot] += PARTICLE_GRAVITY * elapsed
+            x[slot] += vx[slot] * elapsed
+            y[slot] += vy[slot] * elapsed
+            px = x[slot] - view_x
+            py = y[slot] - view_y
+            renderer.queue('coords', items[slot], px - half, py - half, px + half, py + half)
+            slot += 1
+
+    def expire(self, slot):
+        """Hides a particle and swaps the last live one into its slot."""
+        last = self.count - 1
+        items = self.items
+        self.renderer.queue('itemconfigure', items[slot], '-state', 'hidden')
+        if slot != last:
+            for column in (self.x, self.y, self.vx, self.vy, self.life):
+                column[slot] = column[last]
+            items[slot], items[last] = items[last], items[slot]
+        self.count = last
+
+    def clear(self):
+        """Hides every particle, e.g. when the bricks are set up again."""
+        if self.count:
+            self.renderer.queue('itemconfigure', 'particle', '-state', 'hidden')
+        self.count = 0
+        self.last = None
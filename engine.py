@@ -0,0 +1,423 @@
+# engine.py
+
+"""Headless brick breaker simulation.
+
+The Engine owns the balls, paddle, bricks, lives and score and steps them in
+plain Python. Nothing in here touches Tk, so games can be simulated without a
+display; Brick_Break.Game is only a view on top of it.
+"""
+
+import math
+import random
+from array import array
+
+from constants import (
+    WINDOW_WIDTH, WINDOW_HEIGHT, MAX_LIVES,
+    BASE_SPEED, BALL_RADIUS, MAX_BALLS, SPLIT_ANGLE, SERVE_SPREAD,
+    PADDLE_WIDTH, PADDLE_HEIGHT, PADDLE_SPEED, PADDLE_ACCEL,
+    BRICK_ROWS, BRICK_COLS, BRICK_WIDTH, BRICK_HEIGHT, BRICK_PADDING,
+    BRICK_OFFSET_TOP, BRICK_OFFSET_LEFT, BRICK_HITS, BRICK_SCORES, BRICK_SPLIT,
+)
+from spatial import BrickGrid
+from levels import Level
+from collision import sweep_circle_aabb, sweep_circle_walls, reflect
+
+# --- Step Events ---
+# step() returns a bit mask of what happened so views only react to changes.
+EVENT_PADDLE = 1
+EVENT_BRICK = 2
+EVENT_LIFE_LOST = 4
+EVENT_GAME_OVER = 8
+EVENT_WON = 16
+EVENT_BALL_LOST = 32 # One of several balls drained; no life lost
+
+# Most contacts resolved within one step (e.g. a corner between two bricks)
+MAX_CONTACTS = 8
+
+# What the ball touched first during a sweep
+HIT_WALL = -1
+HIT_DRAIN = -2
+HIT_PADDLE = -3
+
+
+def board_size(rows, cols):
+    """Returns the window (width, height) for a rows x cols brick wall.
+
+    Boards up to the default size keep the original window. Bigger ones get
+    even side margins and the same gap below the wall, since the ball
+    starts at the centre.
+    """
+    if rows <= BRICK_ROWS and cols <= BRICK_COLS:
+        return WINDOW_WIDTH, WINDOW_HEIGHT
+    wall_width = cols * (BRICK_WIDTH + BRICK_PADDING) - BRICK_PADDING
+    wall_bottom = BRICK_OFFSET_TOP + rows * (BRICK_HEIGHT + BRICK_PADDING) - BRICK_PADDING
+    width = max(2 * BRICK_OFFSET_LEFT + wall_width, WINDOW_WIDTH)
+    height = max(2 * (wall_bottom + 45), WINDOW_HEIGHT)
+    return width, height
+
+
+class Paddle:
+    """The paddle's position and size, kept in Python so nothing asks Tk."""
+    def __init__(self, x, y, width):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.vx = 0.0 # Velocity while steered with held keys, px per tick
+
+    def coords(self):
+        return (self.x, self.y, self.x + self.width, self.y + PADDLE_HEIGHT)
+
+    def center(self):
+        return self.x + self.width / 2
+
+    def resize(self, width):
+        """Changes the width around the current centre."""
+        center_x = self.center()
+        self.width = width
+        self.x = center_x - width / 2
+
+
+class Balls:
+    """Every ball in play as parallel arrays of doubles.
+
+    Ball 0 is the lead ball (the one served). Removing a ball moves the last
+    one into its slot, so `version` changes whenever indices stop matching
+    the previous step's.
+    """
+    def __init__(self):
+        self.x = array('d')
+        self.y = array('d')
+        self.dx = array('d')
+        self.dy = array('d')
+        self.version = 0
+
+    def __len__(self):
+        return len(self.x)
+
+    def add(self, x, y, dx, dy):
+        self.x.append(x)
+        self.y.append(y)
+        self.dx.append(dx)
+        self.dy.append(dy)
+        self.version += 1
+
+    def remove(self, index):
+        for column in (self.x, self.y, self.dx, self.dy):
+            column[index] = column[-1]
+            del column[-1]
+        self.version += 1
+
+    def clear(self):
+        for column in (self.x, self.y, self.dx, self.dy):
+            del column[:]
+        self.version += 1
+
+    def snapshot(self):
+        """(version, xs, ys) copies, e.g. for render interpolation."""
+        return self.version, array('d', self.x), array('d', self.y)
+
+
+class Engine:
+    """Pure-Python game state and rules, one step per call to step()."""
+    def __init__(self, width=WINDOW_WIDTH, height=WINDOW_HEIGHT,
+                 rows=BRICK_ROWS, cols=BRICK_COLS,
+                 paddle_width=PADDLE_WIDTH, speed=1.0, seed=None, level=None,
+                 base_speed=BASE_SPEED, paddle_speed=PADDLE_SPEED):
+        self.width = width
+        self.height = height
+        # Brick layout; without a level file every cell starts with a brick
+        self.level = level if level is not None else Level.full(rows, cols)
+        self.rows = self.level.rows
+        self.cols = self.level.cols
+
+        self.paddle = Paddle((width - paddle_width) // 2, height - 30, paddle_width)
+        self.paddle_speed = paddle_speed
+
+        # Velocity the ball is served with after a lost life. Each game
+        # starts at the configured speed, turned by a seeded angle, and
+        # paddle deflections drift it from there
+        self.base_speed = base_speed
+        self.speed = speed
+        self.reset_serve()
+
+        # Every random choice in the rules draws from here, so a seed plus
+        # the inputs reproduces a game exactly
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        self.balls = Balls()
+        self.destroyed = [] # Brick indices removed since the view last looked
+        self.damaged = [] # Brick indices hit but still standing, likewise
+        self.bricks_version = 0 # Changes whenever any brick cell does
+        self.reset()
+
+    # --- Setup ---
+
+    def reset(self, seed=None):
+        """Starts a fresh game: full lives, no score, all bricks back."""
+        if seed is not None:
+            self.seed = seed
+            self.rng.seed(seed)
+        self.lives = MAX_LIVES
+        self.score = 0
+        self.reset_serve(self.rng.uniform(-SERVE_SPREAD, SERVE_SPREAD))
+        self.setup_bricks()
+        self.reset_ball()
+
+    def reset_serve(self, angle=0.0):
+        """The configured serve (up and to the right), turned by angle radians."""
+        speed = self.base_speed * self.speed
+        cos = math.cos(angle)
+        sin = math.sin(angle)
+        self.serve_dx = speed * (cos + sin)
+        self.serve_dy = speed * (sin - cos)
+
+    def reset_ball(self):
+        """Back to one ball at the start position, and the paddle too."""
+        self.balls.clear()
+        self.balls.add(self.width // 2, self.height // 2, self.serve_dx, self.serve_dy)
+        self.paddle.x = (self.width - self.paddle.width) // 2
+        self.paddle.vx = 0.0
+
+    def setup_bricks(self):
+        self.grid = BrickGrid(self.rows, self.cols, occupied=self.level.fresh_cells())
+        self.alive = self.grid.occupied # One byte per cell, indexed row-major
+        self.brick_count = self.rows * self.cols # Cells, including empty ones
+        self.bricks_left = self.level.bricks # Breakable ones only
+        self.bricks_version += 1
+        self.destroyed.clear()
+        self.damaged.clear()
+
+    def configure(self, speed=None, paddle_width=None):
+        """Applies the settings screen choices."""
+        if speed is not None:
+            self.speed = speed
+            self.reset_serve()
+            self.ball_dx = self.serve_dx
+            self.ball_dy = self.serve_dy
+        if paddle_width is not None:
+            self.paddle.resize(paddle_width)
+
+    # --- Queries ---
+
+    # The lead ball, for code that only follows one
+    @property
+    def ball_x(self):
+        return self.balls.x[0]
+
+    @ball_x.setter
+    def ball_x(self, value):
+        self.balls.x[0] = value
+
+    @property
+    def ball_y(self):
+        return self.balls.y[0]
+
+    @ball_y.setter
+    def ball_y(self, value):
+        self.balls.y[0] = value
+
+    @property
+    def ball_dx(self):
+        return self.balls.dx[0]
+
+    @ball_dx.setter
+    def ball_dx(self, value):
+        self.balls.dx[0] = value
+
+    @property
+    def ball_dy(self):
+        return self.balls.dy[0]
+
+    @ball_dy.setter
+    def ball_dy(self, value):
+        self.balls.dy[0] = value
+
+    def ball_coords(self):
+        return (self.ball_x - BALL_RADIUS, self.ball_y - BALL_RADIUS,
+                self.ball_x + BALL_RADIUS, self.ball_y + BALL_RADIUS)
+
+    def brick_coords(self, index):
+        return self.grid.brick_coords(index)
+
+    # --- Rules ---
+
+    def move_paddle(self, offset):
+        """Moves the paddle if it stays on screen. Returns True if it moved."""
+        new_x1 = self.paddle.x + offset
+        if new_x1 >= 0 and new_x1 + self.paddle.width <= self.width:
+            self.paddle.x = new_x1
+            return True
+        return False
+
+    def steer(self, direction, dt=1.0):
+        """Drives the paddle for one step with an arrow key held.
+
+        direction is -1 (left), 0 (neither) or 1 (right). The paddle speeds
+        up and slows down by PADDLE_ACCEL per tick, to at most paddle_speed,
+        and stops dead at the walls.
+        """
+        paddle = self.paddle
+        target = direction * self.paddle_speed
+        if PADDLE_ACCEL:
+            change = PADDLE_ACCEL * dt
+            paddle.vx = min(max(target, paddle.vx - change), paddle.vx + change)
+        else:
+            paddle.vx = target
+        if paddle.vx:
+            x = paddle.x + paddle.vx * dt
+            limit = self.width - paddle.width
+            if x <= 0 or x >= limit:
+                x = 0 if x <= 0 else limit
+                paddle.vx = 0.0
+            paddle.x = x
+
+    def step(self, dt=1.0):
+        """Advances every ball by dt ticks (30 ms each) and applies every rule.
+
+        A life is only lost when the last ball in play drains.
+        """
+        events = 0
+        # Backwards, so removing a ball (which moves the last one into its
+        # slot) and splitting one (which appends) never step a ball twice
+        for index in range(len(self.balls) - 1, -1, -1):
+            events |= self.step_ball(index, dt)
+            if events & EVENT_LIFE_LOST:
+                return events
+
+        if not self.bricks_left:
+            events |= EVENT_WON # Win condition
+        return events
+
+    def step_ball(self, index, dt):
+        """Moves one ball through its step.
+
+        Collisions are swept: the ball moves to the earliest contact along its
+        path, bounces, and carries on with the rest of the step.
+        """
+        balls = self.balls
+        x, y, dx, dy = balls.x[index], balls.y[index], balls.dx[index], balls.dy[index]
+        events = 0
+        remaining = 1.0
+        for _ in range(MAX_CONTACTS):
+            move_x = dx * dt * remaining
+            move_y = dy * dt * remaining
+            t, what, nx, ny = self.first_contact(x, y, move_x, move_y)
+            x += move_x * t
+            y += move_y * t
+            if what is None:
+                break
+            remaining *= 1 - t
+
+            if what == HIT_DRAIN:
+                if len(balls) > 1:
+                    balls.remove(index)
+                    return events | EVENT_BALL_LOST
+                balls.x[index] = x
+                balls.y[index] = y
+                return events | self.lose_life()
+            elif what == HIT_WALL:
+                dx, dy = reflect(dx, dy, nx, ny)
+            elif what == HIT_PADDLE:
+                dx, dy = self.paddle_bounce(x, dx, dy, nx, ny)
+                events |= EVENT_PADDLE
+            else:
+                dx, dy = reflect(dx, dy, nx, ny)
+                events |= self.brick_hit(what, x, y, dx, dy)
+
+        balls.x[index] = x
+        balls.y[index] = y
+        balls.dx[index] = dx
+        balls.dy[index] = dy
+        return events
+
+    def first_contact(self, x, y, move_x, move_y):
+        """Returns (t, what, nx, ny) for the earliest thing a ball would hit.
+
+        what is a brick index, one of the HIT_* values, or None with t == 1
+        when the move is free.
+        """
+        r = BALL_RADIUS
+        best_t, what, best_nx, best_ny = 1.0, None, 0.0, 0.0
+
+        hit = sweep_circle_walls(x, y, r, move_x, move_y, self.width, self.height)
+        if hit is not None:
+            best_t, best_nx, best_ny = hit
+            what = HIT_DRAIN if best_ny < 0 else HIT_WALL
+
+        # Box around the whole move: cheap rejects before any exact sweep
+        left = min(x, x + move_x) - r
+        right = max(x, x + move_x) + r
+        top = min(y, y + move_y) - r
+        bottom = max(y, y + move_y) + r
+
+        paddle = self.paddle
+        if (bottom >= paddle.y and top <= paddle.y + PADDLE_HEIGHT and
+                right >= paddle.x and left <= paddle.x + paddle.width):
+            hit = sweep_circle_aabb(x, y, r, move_x, move_y, *paddle.coords())
+            if hit is not None and hit[0] < best_t:
+                best_t, best_nx, best_ny = hit
+                what = HIT_PADDLE
+
+        # Only bricks in the cells the whole move passes through
+        for index in self.grid.live_in(left, top, right, bottom):
+            hit = sweep_circle_aabb(x, y, r, move_x, move_y, *self.grid.brick_coords(index))
+            if hit is not None and hit[0] < best_t:
+                best_t, best_nx, best_ny = hit
+                what = index
+        return best_t, what, best_nx, best_ny
+
+    def lose_life(self):
+        self.lives -= 1
+        if self.lives <= 0:
+            return EVENT_LIFE_LOST | EVENT_GAME_OVER
+        self.reset_ball()
+        return EVENT_LIFE_LOST
+
+    def paddle_bounce(self, x, dx, dy, nx, ny):
+        """Returns the velocity of a ball at x that touched the paddle."""
+        if ny >= 0:
+            # Clipped the paddle's side or underside: plain bounce, no steering
+            return reflect(dx, dy, nx, ny)
+        dy = -abs(dy)
+
+        # Add simple angle deflection based on where it hit the paddle
+        paddle_center = self.paddle.center()
+        hit_ratio = (x - paddle_center) / (self.paddle.width / 2)
+        dx += hit_ratio * 1
+        self.serve_dx += hit_ratio * 1 # The next serve drifts the same way
+
+        # Ensure speed does not get excessive
+        max_speed = self.base_speed * 2
+        current_speed = (dx**2 + dy**2)**0.5
+        if current_speed > max_speed:
+            scale = max_speed / current_speed
+            dx *= scale
+            dy *= scale
+            self.serve_dx = dx
+            self.serve_dy = dy
+        return dx, dy
+
+    def brick_hit(self, index, x, y, dx, dy):
+        """Damages a brick hit by a ball now at x, y moving dx, dy."""
+        kind = self.grid.kind(index)
+        if not BRICK_HITS[kind]:
+            return EVENT_BRICK # Indestructible, nothing changes
+        self.bricks_version += 1
+        if not self.grid.hit(index):
+            self.damaged.append(index) # Cracked, not broken yet
+            return EVENT_BRICK
+        self.bricks_left -= 1
+        self.destroyed.append(index)
+        self.score += BRICK_SCORES[kind]
+        if kind == BRICK_SPLIT:
+            self.split_ball(x, y, dx, dy)
+        return EVENT_BRICK
+
+    def split_ball(self, x, y, dx, dy):
+        """Adds two balls turned either side of the given velocity."""
+        for angle in (SPLIT_ANGLE, -SPLIT_ANGLE):
+            if len(self.balls) >= MAX_BALLS:
+                return
+            cos, sin = math.cos(angle), math.sin(angle)
+            self.balls.add(x, y, dx * cos - dy * sin, dx * sin + dy * cos)
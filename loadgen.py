@@ -0,0 +1,128 @@
+# loadgen.py
+
+"""Load generator for the session server.
+
+Opens many client sessions at once, each holding the arrow keys with a
+randomly changing direction like the sweep's scripted player, and reports
+how many STATE messages and bytes per second the server delivers against
+the rate it promised in its WELCOME, plus how far the clients' ticks lag
+behind the newest tick seen:
+
+    python server.py &
+    python loadgen.py --clients 300 --seconds 10
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from protocol import (
+    FRAME, WELCOME, WELCOME_BODY, STATE, STATE_HEAD,
+    pack_hello, pack_input,
+)
+from engine import EVENT_GAME_OVER, EVENT_WON
+from bench import percentile
+
+INPUT_HZ = 30 # How often a client may change which key it holds
+SETTINGS = {'ball_speed': 'Normal', 'paddle_size': 'Normal', 'brick_color': 'Blue'}
+
+
+class Stats:
+    def __init__(self):
+        self.states = 0
+        self.bytes = 0
+        self.games = 0
+        self.expected = 0.0 # States per second all welcomed clients should get
+        self.last_tick = {} # Client -> newest tick it received
+
+
+async def client(index, host, port, stats, stop, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(pack_hello(SETTINGS))
+
+    async def steer():
+        direction = 0
+        while not stop.is_set():
+            if rng.random() < 0.2:
+                direction = rng.choice((-1, 0, 1))
+                writer.write(pack_input(direction < 0, direction > 0))
+            await asyncio.sleep(1 / INPUT_HZ)
+
+    steering = None
+    rate = 0.0
+    try:
+        while not stop.is_set():
+            (length,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+            payload = await reader.readexactly(length)
+            stats.bytes += FRAME.size + length
+            if payload[0] == WELCOME:
+                _, _, _, hz, send_every = WELCOME_BODY.unpack(payload)
+                rate = hz / send_every
+                stats.expected += rate
+                steering = asyncio.create_task(steer())
+            elif payload[0] == STATE:
+                _, tick, events = STATE_HEAD.unpack_from(payload)[:3]
+                stats.states += 1
+                stats.last_tick[index] = tick
+                if events & (EVENT_GAME_OVER | EVENT_WON):
+                    # Start the next game on a fresh session
+                    stats.games += 1
+                    stats.expected -= rate
+                    rate = 0.0
+                    steering.cancel()
+                    writer.close()
+                    reader, writer = await asyncio.open_connection(host, port)
+                    writer.write(pack_hello(SETTINGS))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        stats.expected -= rate
+        if steering is not None:
+            steering.cancel()
+        writer.close()
+
+
+async def run(args):
+    stats = Stats()
+    stop = asyncio.Event()
+    rng = random.Random(args.seed)
+    tasks = [asyncio.create_task(client(index, args.host, args.port, stats, stop,
+                                        random.Random(rng.random())))
+             for index in range(args.clients)]
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.seconds:
+        states, received = stats.states, stats.bytes
+        await asyncio.sleep(1.0)
+        ticks = sorted(stats.last_tick.values())
+        lag = [ticks[-1] - tick for tick in ticks] if ticks else [0]
+        print(f"{stats.states - states:6d} states/s (expected {stats.expected:.0f}), "
+              f"{(stats.bytes - received) / 1024:8.1f} KiB/s, "
+              f"tick lag p50 {percentile(sorted(lag), 0.5):.0f} "
+              f"max {lag[0]}, {stats.games} games done", file=sys.stderr)
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    elapsed = time.perf_counter() - start
+    print(f"{args.clients} clients: {stats.states / elapsed:.0f} states/s, "
+          f"{stats.bytes / elapsed / 1024:.1f} KiB/s over {elapsed:.1f} s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the session server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
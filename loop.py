@@ -0,0 +1,94 @@
+# loop.py
+
+"""Fixed-timestep clock that decouples physics from Tk's after() timing.
+
+Each frame, advance() reads a monotonic clock, adds the elapsed time to an
+accumulator and reports how many fixed physics steps are due. Slow or late
+frames are made up with extra steps (up to a cap), so the ball covers the
+same distance per second on any machine. alpha says how far the render
+sits between the last two physics states, for interpolation.
+
+LagMonitor measures how late each frame callback arrives, so the game can
+skip redraws and decorative work while Tk is busy (window drags, slow X
+servers) without touching the physics rate.
+"""
+
+import time
+
+from constants import (
+    TICK_SECONDS, PHYSICS_HZ, MAX_SUBSTEPS,
+    LAG_SKIP_RENDER, MAX_SKIPPED_RENDERS, LAG_DEGRADE, LAG_RECOVER, LAG_SMOOTHING,
+)
+
+
+def physics_dt(hz=PHYSICS_HZ):
+    """Engine step size (in 30 ms ticks) for a physics rate in Hz."""
+    return (1.0 / hz) / TICK_SECONDS
+
+
+class FixedTimestep:
+    """Accumulator that turns wall-clock time into whole physics steps."""
+    def __init__(self, hz=PHYSICS_HZ, max_substeps=MAX_SUBSTEPS, clock=time.monotonic):
+        self.step_seconds = 1.0 / hz
+        # Engine speeds are per 30 ms tick, so scale each step to match
+        self.dt = physics_dt(hz)
+        self.max_substeps = max_substeps
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """Forgets time that passed while the simulation was not running."""
+        self.last = self.clock()
+        self.accumulator = 0.0
+
+    def advance(self):
+        """Returns how many physics steps to run for the time since the last call."""
+        now = self.clock()
+        self.accumulator += now - self.last
+        self.last = now
+
+        steps = int(self.accumulator // self.step_seconds)
+        if steps > self.max_substeps:
+            # Too far behind to catch up: drop the backlog instead of spiralling
+            steps = self.max_substeps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.step_seconds
+        return steps
+
+    @property
+    def alpha(self):
+        """Fraction of a physics step left over, for render interpolation."""
+        return self.accumulator / self.step_seconds
+
+
+class LagMonitor:
+    """Tracks event-loop lag and decides which frames to draw."""
+    def __init__(self, interval, clock=time.monotonic):
+        self.interval = interval # Seconds between frames when on time
+        self.clock = clock
+        self.due = None # When the next frame callback should run
+        self.lag = 0.0 # This frame's lateness, s
+        self.average = 0.0 # Smoothed lag, for the degrade thresholds
+        self.degraded = False # Decorative drawing switched off
+        self.skipped = 0 # Redraws skipped in a row
+
+    def expect(self):
+        """Call when scheduling the next frame."""
+        self.due = self.clock() + self.interval
+
+    def frame(self):
+        """Measures this frame's lag. Returns True if it should be drawn."""
+        now = self.clock()
+        self.lag = max(now - self.due, 0.0) if self.due is not None else 0.0
+        self.average += (self.lag - self.average) * LAG_SMOOTHING
+        if self.degraded:
+            self.degraded = self.average > LAG_RECOVER
+        else:
+            self.degraded = self.average >= LAG_DEGRADE
+
+        if self.lag >= LAG_SKIP_RENDER and self.skipped < MAX_SKIPPED_RENDERS:
+            self.skipped += 1
+            return False
+        self.skipped = 0
+        return True
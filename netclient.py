@@ -0,0 +1,106 @@
+# netclient.py
+
+"""Thin-client side of the session server, for the Tk game.
+
+The Tk loop is not asyncio, so the client uses a plain socket: connect()
+blocks until the server has welcomed it, after which the socket is
+non-blocking and poll() is called once per frame to collect whatever states
+have arrived. Input the socket cannot take yet waits in a buffer and goes
+out with the next send, so a full send buffer never drops the session.
+"""
+
+import socket
+
+from protocol import (
+    FrameReader, State, WELCOME, WELCOME_BODY, STATE,
+    pack_hello, pack_input,
+)
+
+
+class NetClient:
+    """One session on a game server."""
+    def __init__(self, host, port):
+        self.address = (host, port)
+        self.sock = None
+        self.reader = FrameReader()
+        self.early = [] # States that arrived along with the WELCOME
+        self.session = None
+        self.seed = None
+        self.sent_held = None # Last held keys sent, to only send changes
+        self.outgoing = bytearray() # Frames the socket has not taken yet
+        self.closed = True
+
+    def connect(self, settings, timeout=5.0):
+        """Starts a game with these settings. Returns the game's seed."""
+        self.close()
+        try:
+            self.sock = socket.create_connection(self.address, timeout=timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self.sock.sendall(pack_hello(settings))
+            self.reader = FrameReader()
+            self.early = []
+            while self.session is None:
+                data = self.sock.recv(4096)
+                if not data:
+                    raise ConnectionError("server closed the connection")
+                for payload in self.reader.feed(data):
+                    if payload[0] == WELCOME:
+                        _, self.session, self.seed, _, _ = WELCOME_BODY.unpack(payload)
+                    elif payload[0] == STATE:
+                        self.early.append(State(payload))
+        except OSError:
+            self.close()
+            raise
+        self.sock.setblocking(False)
+        self.sent_held = None
+        self.outgoing.clear()
+        self.closed = False
+        return self.seed
+
+    def send_input(self, held_left, held_right, left_moves=0, right_moves=0):
+        """Sends the keys if they changed (moves are always sent)."""
+        if self.closed:
+            return
+        held = (held_left, held_right)
+        if held != self.sent_held or left_moves or right_moves:
+            self.sent_held = held
+            self.outgoing += pack_input(held_left, held_right, left_moves, right_moves)
+        if self.outgoing:
+            self.flush()
+
+    def flush(self):
+        """Sends as much of the buffered input as the socket takes now."""
+        try:
+            sent = self.sock.send(self.outgoing)
+        except BlockingIOError:
+            return # Send buffer full; try again next frame
+        except OSError:
+            self.closed = True
+            return
+        del self.outgoing[:sent]
+
+    def poll(self):
+        """Returns the states received since the last call, oldest first."""
+        states, self.early = self.early, []
+        while not self.closed: # Also stops a client that never connected
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                data = b''
+            if not data:
+                self.closed = True
+                break
+            for payload in self.reader.feed(data):
+                if payload[0] == STATE:
+                    states.append(State(payload))
+        return states
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+        self.session = None
+        self.outgoing.clear()
+        self.closed = True
@@ -0,0 +1,149 @@
+# profiler.py
+
+"""Optional frame profiler for the Tk game.
+
+Times the physics, collision and render phases of every frame, and how late
+the frame itself started (lag, shown as a span just before it), keeps a
+rolling window of recent samples for FPS and percentile read-outs, and
+records a timeline that can be saved in Chrome trace format (open it in
+chrome://tracing or Perfetto). The game only creates a profiler when it is
+switched on (F3), so a disabled profiler costs one `is None` check per phase.
+"""
+
+import json
+import time
+from array import array
+
+PHASES = ('frame', 'physics', 'collision', 'render', 'lag')
+FRAME, PHYSICS, COLLISION, RENDER, LAG = range(len(PHASES))
+
+HISTORY = 240 # Frames kept for the rolling statistics (about 4 s at 60 fps)
+TRACE_CAPACITY = 65536 # Timeline events kept for export, oldest dropped first
+HUD_REFRESH = 0.5 # Seconds between overlay text updates
+
+
+class FrameProfiler:
+    """Per-phase frame timings in preallocated ring buffers."""
+    def __init__(self, history=HISTORY, trace_capacity=TRACE_CAPACITY,
+                 clock=time.perf_counter):
+        self.clock = clock
+        self.origin = clock()
+        self.history = history
+        # One rolling window of per-frame totals for each phase
+        self.samples = [array('d', bytes(8 * history)) for _ in PHASES]
+        self.frame_count = 0
+        self.frame_totals = [0.0] * len(PHASES)
+        self.frame_starts = array('d', bytes(8 * history))
+        self.frame_start = 0.0
+
+        self.trace_capacity = trace_capacity
+        self.trace_phase = array('B', bytes(trace_capacity))
+        self.trace_start = array('d', bytes(8 * trace_capacity))
+        self.trace_duration = array('d', bytes(8 * trace_capacity))
+        self.trace_count = 0
+
+        self.counters = {} # Named per-frame counts, e.g. skipped renders
+        self.last_hud = 0.0
+
+    # --- Recording ---
+
+    def begin_frame(self):
+        self.frame_start = self.clock()
+        for phase in range(len(PHASES)):
+            self.frame_totals[phase] = 0.0
+
+    def end_frame(self):
+        end = self.clock()
+        self.add(FRAME, self.frame_start, end - self.frame_start)
+        slot = self.frame_count % self.history
+        self.frame_starts[slot] = self.frame_start
+        for phase in range(len(PHASES)):
+            self.samples[phase][slot] = self.frame_totals[phase]
+        self.frame_count += 1
+
+    def add(self, phase, start, duration):
+        """Records one timed span of a phase."""
+        self.frame_totals[phase] += duration
+        slot = self.trace_count % self.trace_capacity
+        self.trace_phase[slot] = phase
+        self.trace_start[slot] = start
+        self.trace_duration[slot] = duration
+        self.trace_count += 1
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def timed(self, phase, function):
+        """Wraps a function so every call is recorded under phase."""
+        clock = self.clock
+        add = self.add
+
+        def wrapper(*args):
+            start = clock()
+            result = function(*args)
+            add(phase, start, clock() - start)
+            return result
+        return wrapper
+
+    # --- Read-outs ---
+
+    def stats(self, phase):
+        """Returns (p50, p95, p99, max) in ms over the rolling window."""
+        n = min(self.frame_count, self.history)
+        if not n:
+            return (0.0, 0.0, 0.0, 0.0)
+        ordered = sorted(self.samples[phase][:n])
+        pick = lambda fraction: ordered[min(int(fraction * n), n - 1)] * 1e3
+        return (pick(0.50), pick(0.95), pick(0.99), ordered[-1] * 1e3)
+
+    def fps(self):
+        n = min(self.frame_count, self.history)
+        if n < 2:
+            return 0.0
+        newest = (self.frame_count - 1) % self.history
+        oldest = (self.frame_count - n) % self.history
+        span = self.frame_starts[newest] - self.frame_starts[oldest]
+        return (n - 1) / span if span > 0 else 0.0
+
+    def hud_due(self):
+        """True at most every HUD_REFRESH seconds, to throttle overlay updates."""
+        now = self.clock()
+        if now - self.last_hud < HUD_REFRESH:
+            return False
+        self.last_hud = now
+        return True
+
+    def hud_text(self):
+        lines = [f"{self.fps():.0f} fps  (ms p50/p95/p99/max)"]
+        for phase, name in enumerate(PHASES):
+            lines.append(f"{name}: " + "/".join(f"{v:.2f}" for v in self.stats(phase)))
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name}: {value}")
+        return "\n".join(lines)
+
+    # --- Export ---
+
+    def trace_events(self):
+        """Returns the recorded timeline as Chrome trace 'complete' events."""
+        events = []
+        count = min(self.trace_count, self.trace_capacity)
+        first = self.trace_count - count
+        for n in range(first, self.trace_count):
+            slot = n % self.trace_capacity
+            events.append({
+                'name': PHASES[self.trace_phase[slot]],
+                'ph': 'X',
+                'ts': (self.trace_start[slot] - self.origin) * 1e6,
+                'dur': self.trace_duration[slot] * 1e6,
+                'pid': 1,
+                'tid': 1,
+            })
+        return events
+
+    def export_trace(self, path):
+        """Writes the timeline as a Chrome trace JSON file."""
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.trace_events(),
+                       'displayTimeUnit': 'ms',
+                       'otherData': {'counters': self.counters}}, f)
+        return path
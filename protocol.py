@@ -0,0 +1,137 @@
+# protocol.py
+
+"""Wire format between the game-session server and its clients.
+
+Every message is a frame: a little-endian uint16 payload length, then the
+payload, whose first byte is the message type.
+
+    HELLO   client -> server  settings JSON (as in recordings), starts a game
+    WELCOME server -> client  session id, seed, physics rate, send interval
+    INPUT   client -> server  held arrow keys and discrete moves since the last
+    STATE   server -> client  one state delta (see below)
+
+A STATE carries the tick, step events, score, lives and paddle x, every
+ball's position as float32 pairs, and only the bricks that changed since the
+previous STATE: destroyed indices, and damaged indices with their new cell
+byte. A client keeps a mirror Engine (never stepped) and feeds it each state
+with apply_state(), so the usual renderer can draw it unchanged.
+"""
+
+import json
+import struct
+from array import array
+
+FRAME = struct.Struct('<H')
+
+HELLO = 1
+WELCOME = 2
+INPUT = 3
+STATE = 4
+
+WELCOME_BODY = struct.Struct('<BIIHH') # type, session, seed, physics Hz, ticks per state
+INPUT_BODY = struct.Struct('<BBBB') # type, held keys (1 left, 2 right), left moves, right moves
+STATE_HEAD = struct.Struct('<BIHIBfHHH') # type, tick, events, score, lives, paddle x,
+                                         # balls, destroyed, damaged
+HELD_LEFT = 1
+HELD_RIGHT = 2
+
+
+def frame(payload):
+    return FRAME.pack(len(payload)) + payload
+
+
+def pack_hello(settings):
+    return frame(bytes([HELLO]) + json.dumps(settings, sort_keys=True).encode())
+
+
+def pack_welcome(session, seed, physics_hz, send_every):
+    return frame(WELCOME_BODY.pack(WELCOME, session, seed, physics_hz, send_every))
+
+
+def pack_input(held_left, held_right, left_moves=0, right_moves=0):
+    held = (HELD_LEFT if held_left else 0) | (HELD_RIGHT if held_right else 0)
+    return frame(INPUT_BODY.pack(INPUT, held, min(left_moves, 255), min(right_moves, 255)))
+
+
+def pack_state(tick, events, engine, destroyed, damaged):
+    """Encodes the engine's state; destroyed/damaged are brick indices."""
+    balls = engine.balls
+    positions = array('f', bytes(8 * len(balls)))
+    positions[0::2] = array('f', balls.x)
+    positions[1::2] = array('f', balls.y)
+    alive = engine.alive
+    payload = b''.join((
+        STATE_HEAD.pack(STATE, tick, events, engine.score, max(engine.lives, 0),
+                        engine.paddle.x, len(balls), len(destroyed), len(damaged)),
+        positions.tobytes(),
+        array('I', destroyed).tobytes(),
+        array('I', damaged).tobytes(),
+        bytes(alive[index] for index in damaged),
+    ))
+    return frame(payload)
+
+
+class State:
+    """A decoded STATE message."""
+    __slots__ = ('tick', 'events', 'score', 'lives', 'paddle_x',
+                 'positions', 'destroyed', 'damaged', 'cells')
+
+    def __init__(self, payload):
+        (_, self.tick, self.events, self.score, self.lives, self.paddle_x,
+         balls, destroyed, damaged) = STATE_HEAD.unpack_from(payload)
+        offset = STATE_HEAD.size
+        self.positions = array('f', payload[offset:offset + 8 * balls])
+        offset += 8 * balls
+        self.destroyed = array('I', payload[offset:offset + 4 * destroyed])
+        offset += 4 * destroyed
+        self.damaged = array('I', payload[offset:offset + 4 * damaged])
+        offset += 4 * damaged
+        self.cells = payload[offset:offset + damaged]
+
+
+def apply_state(engine, state):
+    """Makes a mirror engine match a server state. Returns the step events."""
+    balls = engine.balls
+    xs = state.positions[0::2]
+    ys = state.positions[1::2]
+    if len(xs) != len(balls):
+        balls.clear()
+        for x, y in zip(xs, ys):
+            balls.add(x, y, 0.0, 0.0)
+    else:
+        balls.x[:] = array('d', xs)
+        balls.y[:] = array('d', ys)
+    engine.paddle.x = state.paddle_x
+    engine.score = state.score
+    engine.lives = state.lives
+    for index in state.destroyed:
+        engine.grid.remove(index)
+        engine.bricks_left -= 1
+        engine.destroyed.append(index)
+    for index, cell in zip(state.damaged, state.cells):
+        engine.alive[index] = cell
+        engine.damaged.append(index)
+    if state.destroyed or state.damaged:
+        engine.bricks_version += 1
+    return state.events
+
+
+class FrameReader:
+    """Splits a byte stream into message payloads."""
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Adds received bytes and returns every complete payload."""
+        self.buffer += data
+        payloads = []
+        offset = 0
+        while len(self.buffer) - offset >= FRAME.size:
+            (length,) = FRAME.unpack_from(self.buffer, offset)
+            end = offset + FRAME.size + length
+            if end > len(self.buffer):
+                break
+            payloads.append(bytes(self.buffer[offset + FRAME.size:end]))
+            offset = end
+        del self.buffer[:offset]
+        return payloads
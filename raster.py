@@ -0,0 +1,340 @@
+# raster.py
+
+"""Offscreen NumPy rasterizer: the game's canvas scene as RGB arrays.
+
+FrameRasterizer draws what CanvasRenderer shows into one reusable
+height x width x 3 uint8 array: bricks in their type colours with crack
+outlines, the rounded paddle, every ball, and the score and lives. It
+follows the lead ball through big boards the same way. The background and
+bricks are a cached layer that is only redrawn where bricks changed, or in
+full when the view scrolls, so a frame is one layer copy plus the moving
+parts. That makes it usable for video export, visual regression tests and
+bots that play from pixels. Requires NumPy.
+
+    python raster.py --seconds 60                       # throughput only
+    python raster.py --replay game.bbr --output game.rgb
+    python raster.py --output demo.mp4                  # needs ffmpeg
+
+Raw output is rgb24 frames back to back, e.g. for
+`ffplay -f rawvideo -pixel_format rgb24 -video_size 600x400 game.rgb`.
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from constants import (
+    WINDOW_WIDTH, WINDOW_HEIGHT, PHYSICS_HZ,
+    BACKGROUND_COLOR, BRICK_COLOR, BRICK_COLORS, BRICK_TYPE_COLORS, BRICK_DAMAGED_OUTLINE,
+    PADDLE_COLOR, PADDLE_EDGE_COLOR, BALL_COLOR,
+    BALL_RADIUS, PADDLE_HEIGHT, PADDLE_CORNER_RADIUS,
+)
+from engine import Engine, EVENT_GAME_OVER, EVENT_WON
+from render import view_origin
+from replay import Recording, make_engine, apply_moves, FROZEN
+from autopilot import Autopilot
+from loop import physics_dt
+
+SCORE_COLOR = '#FFFFFF'
+LIVES_COLOR = '#FF4C4C'
+TEXT_SCALE = 2 # HUD glyphs are 5x7, drawn this many pixels per dot
+
+# Just the characters the HUD needs
+GLYPHS = {
+    ' ': ('     ',) * 7,
+    ':': ('     ', ' ##  ', ' ##  ', '     ', ' ##  ', ' ##  ', '     '),
+    'S': (' ### ', '#   #', '#    ', ' ### ', '    #', '#   #', ' ### '),
+    'L': ('#    ', '#    ', '#    ', '#    ', '#    ', '#    ', '#####'),
+    'c': ('     ', '     ', ' ### ', '#    ', '#    ', '#    ', ' ### '),
+    'e': ('     ', '     ', ' ### ', '#   #', '#####', '#    ', ' ### '),
+    'i': ('  #  ', '     ', ' ##  ', '  #  ', '  #  ', '  #  ', ' ### '),
+    'o': ('     ', '     ', ' ### ', '#   #', '#   #', '#   #', ' ### '),
+    'r': ('     ', '     ', '# ## ', '##   ', '#    ', '#    ', '#    '),
+    's': ('     ', '     ', ' ####', '#    ', ' ### ', '    #', '#### '),
+    'v': ('     ', '     ', '#   #', '#   #', '#   #', ' # # ', '  #  '),
+    '0': (' ### ', '#   #', '#  ##', '# # #', '##  #', '#   #', ' ### '),
+    '1': ('  #  ', ' ##  ', '  #  ', '  #  ', '  #  ', '  #  ', ' ### '),
+    '2': (' ### ', '#   #', '    #', '   # ', '  #  ', ' #   ', '#####'),
+    '3': ('#####', '   # ', '  #  ', '   # ', '    #', '#   #', ' ### '),
+    '4': ('   # ', '  ## ', ' # # ', '#  # ', '#####', '   # ', '   # '),
+    '5': ('#####', '#    ', '#### ', '    #', '    #', '#   #', ' ### '),
+    '6': ('  ## ', ' #   ', '#    ', '#### ', '#   #', '#   #', ' ### '),
+    '7': ('#####', '    #', '   # ', '  #  ', ' #   ', ' #   ', ' #   '),
+    '8': (' ### ', '#   #', '#   #', ' ### ', '#   #', '#   #', ' ### '),
+    '9': (' ### ', '#   #', '#   #', ' ####', '    #', '   # ', ' ##  '),
+}
+FONT = {char: np.array([[dot == '#' for dot in row] for row in rows])
+        for char, rows in GLYPHS.items()}
+
+
+def rgb(color):
+    """A '#RRGGBB' colour, or one of the Tk names the game uses, as RGB."""
+    color = {'black': '#000000', 'white': '#FFFFFF'}.get(color, color)
+    return np.array([int(color[i:i + 2], 16) for i in (1, 3, 5)], np.uint8)
+
+
+def disk(diameter, inset=0):
+    """Mask of the pixels whose centres lie `inset` px inside a circle."""
+    centers = np.arange(diameter) + 0.5 - diameter / 2
+    radius = diameter / 2 - inset
+    return centers[:, None] ** 2 + centers[None, :] ** 2 <= radius ** 2
+
+
+def text_mask(text, scale=TEXT_SCALE):
+    mask = np.zeros((7, 6 * len(text)), bool)
+    for n, char in enumerate(text):
+        mask[:, 6 * n:6 * n + 5] = FONT[char]
+    return mask.repeat(scale, 0).repeat(scale, 1)
+
+
+def fill(image, x1, y1, x2, y2, color):
+    """Fills a rectangle, clipped to the image."""
+    x1 = max(x1, 0)
+    y1 = max(y1, 0)
+    if x2 > x1 and y2 > y1:
+        image[y1:y2, x1:x2] = color
+
+
+def paint(image, mask, x, y, color):
+    """Colours a mask's pixels with its top-left corner at x, y, clipped."""
+    height, width = mask.shape
+    x1, y1 = max(x, 0), max(y, 0)
+    x2, y2 = min(x + width, image.shape[1]), min(y + height, image.shape[0])
+    if x2 > x1 and y2 > y1:
+        image[y1:y2, x1:x2][mask[y1 - y:y2 - y, x1 - x:x2 - x]] = color
+
+
+class FrameRasterizer:
+    """Draws an engine's state into a reusable RGB array."""
+    def __init__(self, engine, brick_color=BRICK_COLOR,
+                 width=WINDOW_WIDTH, height=WINDOW_HEIGHT):
+        self.engine = engine
+        self.brick_color = brick_color
+        self.width = width
+        self.height = height
+        self.frame = np.empty((height, width, 3), np.uint8)
+        self.layer = np.empty_like(self.frame) # Background and bricks
+        self.colors = {} # Colour string -> RGB
+
+        # Canvas ovals have a 1 px outline; the paddle's ends have 2 px
+        self.ball_fill = disk(2 * BALL_RADIUS, 1)
+        self.ball_edge = disk(2 * BALL_RADIUS) & ~self.ball_fill
+        self.cap_fill = disk(PADDLE_HEIGHT, 2)
+        self.cap_edge = disk(PADDLE_HEIGHT) & ~self.cap_fill
+        self.texts = {} # HUD text -> glyph mask
+
+        # What the cached layer shows
+        self.view = None
+        self.grid = None
+        self.cells = None
+        self.bricks_version = None
+
+    def color(self, color):
+        rgb_color = self.colors.get(color)
+        if rgb_color is None:
+            rgb_color = self.colors[color] = rgb(color)
+        return rgb_color
+
+    # --- Cached layer ---
+
+    def update_layer(self, view):
+        engine = self.engine
+        cells = np.frombuffer(engine.alive, np.uint8)
+        if view != self.view or engine.grid is not self.grid:
+            # Scrolled or a new game: redraw the bricks in view
+            self.view = view
+            self.grid = engine.grid
+            self.layer[:] = self.color(BACKGROUND_COLOR)
+            view_x, view_y = view
+            for index in engine.grid.live_in(view_x, view_y,
+                                             view_x + self.width, view_y + self.height):
+                self.draw_brick(index)
+            self.cells = cells.copy()
+            self.bricks_version = engine.bricks_version
+        elif engine.bricks_version != self.bricks_version:
+            # Only the bricks that broke or cracked since the last frame
+            self.bricks_version = engine.bricks_version
+            changed = np.flatnonzero(cells != self.cells)
+            self.cells[changed] = cells[changed]
+            for index in changed.tolist():
+                self.draw_brick(index)
+
+    def draw_brick(self, index):
+        """Draws a brick into the layer, or clears its spot if it is gone."""
+        grid = self.engine.grid
+        x1, y1, x2, y2 = grid.brick_coords(index)
+        view_x, view_y = self.view
+        x1 -= view_x
+        x2 -= view_x
+        y1 -= view_y
+        y2 -= view_y
+        if not self.engine.alive[index]:
+            fill(self.layer, x1, y1, x2, y2, self.color(BACKGROUND_COLOR))
+            return
+        damage = grid.damage(index)
+        outline, width = (BRICK_DAMAGED_OUTLINE, 2 * damage) if damage else ('black', 1)
+        fill(self.layer, x1, y1, x2, y2, self.color(outline))
+        fill(self.layer, x1 + width, y1 + width, x2 - width, y2 - width,
+             self.color(BRICK_TYPE_COLORS[grid.kind(index)] or self.brick_color))
+
+    # --- Frame ---
+
+    def render(self, ball_xs=None, ball_ys=None):
+        """Returns the frame array, redrawn for the engine's current state.
+
+        The same array comes back every call; copy it to keep a frame.
+        """
+        engine = self.engine
+        if ball_xs is None:
+            ball_xs, ball_ys = engine.balls.x, engine.balls.y
+        view = view_origin(engine, ball_xs[0], ball_ys[0])
+        self.update_layer(view)
+        frame = self.frame
+        np.copyto(frame, self.layer)
+        view_x, view_y = view
+
+        paddle = engine.paddle
+        x1 = int(round(paddle.x)) - view_x
+        y1 = int(round(paddle.y)) - view_y
+        x2 = x1 + int(round(paddle.width))
+        r = PADDLE_CORNER_RADIUS
+        fill(frame, x1 + r, y1, x2 - r, y1 + PADDLE_HEIGHT, self.color(PADDLE_COLOR))
+        for cap_x in (x1, x2 - PADDLE_HEIGHT):
+            paint(frame, self.cap_fill, cap_x, y1, self.color(PADDLE_COLOR))
+            paint(frame, self.cap_edge, cap_x, y1, self.color(PADDLE_EDGE_COLOR))
+
+        ball = self.color(BALL_COLOR)
+        edge = self.color('black')
+        for x, y in zip(ball_xs, ball_ys):
+            left = int(round(x)) - BALL_RADIUS - view_x
+            top = int(round(y)) - BALL_RADIUS - view_y
+            paint(frame, self.ball_fill, left, top, ball)
+            paint(frame, self.ball_edge, left, top, edge)
+
+        self.draw_text(f"Score: {engine.score}", 10, 10, SCORE_COLOR)
+        lives = self.text(f"Lives: {engine.lives}")
+        paint(frame, lives, WINDOW_WIDTH // 2 - lives.shape[1] // 2, 10,
+              self.color(LIVES_COLOR))
+        return frame
+
+    def text(self, text):
+        mask = self.texts.get(text)
+        if mask is None:
+            if len(self.texts) > 64:
+                self.texts.clear() # Old scores are not coming back
+            mask = self.texts[text] = text_mask(text)
+        return mask
+
+    def draw_text(self, text, x, y, color):
+        paint(self.frame, self.text(text), x, y, self.color(color))
+
+
+class FrameWriter:
+    """Streams frames to a raw rgb24 file, or through ffmpeg to a video."""
+    def __init__(self, path, width, height, fps):
+        self.process = None
+        if path.endswith(('.rgb', '.raw')):
+            self.stream = open(path, 'wb')
+            return
+        ffmpeg = shutil.which('ffmpeg')
+        if ffmpeg is None:
+            raise RuntimeError(f"writing {path} needs ffmpeg on the PATH; "
+                               f"use a .rgb file for raw frames")
+        self.process = subprocess.Popen(
+            [ffmpeg, '-loglevel', 'error', '-y',
+             '-f', 'rawvideo', '-pixel_format', 'rgb24',
+             '-video_size', f'{width}x{height}', '-framerate', str(fps), '-i', '-',
+             '-pix_fmt', 'yuv420p', path],
+            stdin=subprocess.PIPE)
+        self.stream = self.process.stdin
+
+    def write(self, frame):
+        self.stream.write(frame.data)
+
+    def close(self):
+        self.stream.close()
+        if self.process is not None and self.process.wait():
+            raise RuntimeError(f"ffmpeg exited with status {self.process.returncode}")
+
+
+def replay_ticks(engine, recording):
+    """Steps an engine through a recording, yielding each tick's events."""
+    dt = recording.dt
+    for code in recording.ticks:
+        apply_moves(engine, code, dt)
+        yield 0 if code & FROZEN else engine.step(dt)
+
+
+def autopilot_ticks(engine):
+    pilot = Autopilot(engine)
+    dt = physics_dt()
+    while True:
+        pilot.press(dt)
+        yield engine.step(dt)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a headless game to RGB frames.")
+    parser.add_argument('--replay', metavar='PATH',
+                        help='render a recorded game (default: an autopilot game)')
+    parser.add_argument('--seed', type=int, default=1, help='autopilot game seed')
+    parser.add_argument('--seconds', type=float,
+                        help='most game time to render (default: 60, or all of a replay)')
+    parser.add_argument('--fps', type=int, default=60)
+    parser.add_argument('--output', metavar='PATH',
+                        help='.rgb or .raw for raw frames, anything else is encoded by ffmpeg')
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        recording = Recording.load(args.replay)
+        engine = make_engine(recording.settings, recording.seed)
+        brick_color = BRICK_COLORS.get(recording.settings.get('brick_color'), BRICK_COLOR)
+        hz = recording.physics_hz
+        ticks = replay_ticks(engine, recording)
+    else:
+        engine = Engine(seed=args.seed)
+        brick_color = BRICK_COLOR
+        hz = PHYSICS_HZ
+        ticks = autopilot_ticks(engine)
+
+    rasterizer = FrameRasterizer(engine, brick_color)
+    writer = None
+    if args.output:
+        try:
+            writer = FrameWriter(args.output, rasterizer.width, rasterizer.height, args.fps)
+        except RuntimeError as error:
+            parser.error(str(error))
+    every = max(1, round(hz / args.fps)) # Physics ticks per frame
+    if args.seconds is not None:
+        max_ticks = int(args.seconds * hz)
+    else:
+        max_ticks = len(recording.ticks) if args.replay else 60 * hz
+    frames = 0
+    render_seconds = 0.0
+    for tick, events in enumerate(ticks, 1):
+        done = events & (EVENT_GAME_OVER | EVENT_WON) or tick >= max_ticks
+        if tick % every == 0 or done:
+            start = time.perf_counter()
+            frame = rasterizer.render()
+            render_seconds += time.perf_counter() - start
+            if writer is not None:
+                writer.write(frame)
+            frames += 1
+        if done:
+            break
+    if writer is not None:
+        writer.close()
+
+    rate = frames / render_seconds if render_seconds else 0.0
+    print(f"{frames} frames ({frames / args.fps:.1f} s at {args.fps} fps) rendered at "
+          f"{rate:.0f} frames/s, {rate / args.fps:.0f}x real time, "
+          f"score {engine.score}, lives {engine.lives}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
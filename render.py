@@ -0,0 +1,295 @@
+# render.py
+
+"""Retained-mode canvas renderer that only sends Tk what changed.
+
+The renderer remembers what it last drew (ball position, paddle geometry,
+score, lives and which bricks exist). Once per frame render() compares that
+with the engine and writes the differences as one Tcl script, so a frame
+costs a single Python -> Tcl round trip however many things changed, and
+none at all when nothing did.
+
+Boards bigger than the canvas are shown through a viewport that follows the
+ball. Only bricks inside it have canvas items; they are created as they
+scroll into view and deleted as they leave, so the item count depends on the
+window size, not the level size.
+"""
+
+from constants import (
+    WINDOW_WIDTH, WINDOW_HEIGHT,
+    PADDLE_COLOR, PADDLE_EDGE_COLOR, BALL_COLOR, BRICK_COLOR,
+    BRICK_TYPE_COLORS, BRICK_DAMAGED_OUTLINE,
+    BALL_RADIUS, PADDLE_HEIGHT, PADDLE_CORNER_RADIUS,
+)
+from spatial import TYPE_MASK
+from effects import ParticlePool
+
+
+def tcl_quote(text):
+    """Quotes plain text (no braces or backslashes) as one Tcl word."""
+    return '{' + text + '}'
+
+
+def view_origin(engine, x, y):
+    """Top-left board corner of a window-sized view centred on x, y."""
+    view_x = int(max(min(x - WINDOW_WIDTH / 2, engine.width - WINDOW_WIDTH), 0))
+    view_y = int(max(min(y - WINDOW_HEIGHT / 2, engine.height - WINDOW_HEIGHT), 0))
+    return view_x, view_y
+
+
+class CanvasRenderer:
+    """Owns the canvas items for the HUD, paddle, ball and bricks."""
+    def __init__(self, canvas, engine):
+        self.canvas = canvas
+        self.engine = engine
+        self.path = str(canvas) # Tcl name of the canvas widget
+        self.brick_color = BRICK_COLOR
+        self.script = [] # Tcl commands queued for this frame
+        self.degraded = False # Set while the game lags; cracks wait until it clears
+
+        # --- SCORE ---
+        self.score_text = self.canvas.create_text(
+            10, 10,
+            text="Score: 0",
+            anchor="nw",
+            font=("Helvetica", 14, "bold"),
+            fill="white",
+            tags="score"
+        )
+
+        # --- LIVES ---
+        self.lives_text = self.canvas.create_text(
+            WINDOW_WIDTH // 2, 10,
+            text=f"Lives: {self.engine.lives}",
+            anchor="n",
+            font=("Helvetica", 14, "bold"),
+            fill="#FF4C4C", # Red color for emphasis
+            tags="lives"
+        )
+        self.drawn_score = 0
+        self.drawn_lives = self.engine.lives
+
+        # The rounded paddle is a rectangle and two ovals, made once
+        rect_id = self.canvas.create_rectangle(
+            0, 0, 0, 0,
+            fill=PADDLE_COLOR, outline=PADDLE_COLOR, tags=('paddle_tag', 'paddle_rect')
+        )
+        left_circle_id = self.canvas.create_oval(
+            0, 0, 0, 0,
+            fill=PADDLE_COLOR, outline=PADDLE_EDGE_COLOR, width=2, tags='paddle_tag'
+        )
+        right_circle_id = self.canvas.create_oval(
+            0, 0, 0, 0,
+            fill=PADDLE_COLOR, outline=PADDLE_EDGE_COLOR, width=2, tags='paddle_tag'
+        )
+        self.paddle_ids = [rect_id, left_circle_id, right_circle_id]
+        self.drawn_paddle = None # (x, y, width) currently on the canvas
+
+        # One oval per ball in play, indexed like engine.balls
+        self.ball_ids = [self.canvas.create_oval(
+            *self.engine.ball_coords(),
+            fill=BALL_COLOR, tags='ball_tag'
+        )]
+        self.drawn_balls = [(self.engine.ball_x, self.engine.ball_y)]
+
+        # Board coordinates of the canvas's top-left corner
+        self.view_x = 0
+        self.view_y = 0
+
+        # Canvas item per brick index, only for bricks in the drawn cells
+        self.brick_items = {}
+        self.drawn_cells = None # (row0, row1, col0, col1) covered by items
+
+        # Bursts where bricks break, from a fixed pool of hidden items
+        self.particles = ParticlePool(self)
+        self.setup_bricks()
+        self.render()
+
+    def setup_bricks(self):
+        """Throws away all brick items and draws the visible ones afresh."""
+        self.canvas.delete('brick')
+        self.brick_items = {}
+        self.drawn_cells = None
+        self.engine.destroyed.clear()
+        self.engine.damaged.clear()
+        self.particles.clear()
+        self.cull()
+
+    # --- Viewport ---
+
+    def follow(self, x, y):
+        """Scrolls the view to centre on x, y without leaving the board."""
+        view_x, view_y = view_origin(self.engine, x, y)
+        if (view_x, view_y) == (self.view_x, self.view_y):
+            return
+        if self.brick_items:
+            self.queue('move', 'brick', self.view_x - view_x, self.view_y - view_y)
+        self.view_x = view_x
+        self.view_y = view_y
+        self.cull()
+
+    def cull(self):
+        """Creates items for bricks that scrolled in, deletes those that left."""
+        grid = self.engine.grid
+        view = (self.view_x, self.view_y,
+                self.view_x + WINDOW_WIDTH, self.view_y + WINDOW_HEIGHT)
+        cells = grid.cell_range(*view)
+        if cells == self.drawn_cells:
+            return
+        row0, row1, col0, col1 = cells
+        self.drawn_cells = cells
+
+        gone = []
+        for index in list(self.brick_items):
+            row, col = divmod(index, grid.cols)
+            if not (row0 <= row <= row1 and col0 <= col <= col1):
+                gone.append(self.brick_items.pop(index))
+        if gone:
+            self.queue('delete', *gone)
+
+        new = [index for index in grid.live_in(*view) if index not in self.brick_items]
+        if new:
+            # Earlier commands (the scroll) must land before items are made
+            # in the new view's coordinates
+            self.flush()
+            self.create_bricks(new)
+
+    def create_bricks(self, indices):
+        """Creates rectangles for the given bricks in one Tcl call."""
+        grid = self.engine.grid
+        creates = []
+        for index in indices:
+            x1, y1, x2, y2 = grid.brick_coords(index)
+            fill = BRICK_TYPE_COLORS[grid.kind(index)] or self.brick_color
+            creates.append(f'[{self.path} create rectangle {x1 - self.view_x} '
+                           f'{y1 - self.view_y} {x2 - self.view_x} {y2 - self.view_y} '
+                           f'-fill {fill} {self.damage_options(index)} -tags brick]')
+        ids = self.canvas.tk.splitlist(self.canvas.tk.eval('list ' + ' '.join(creates)))
+        for index, item in zip(indices, ids):
+            self.brick_items[index] = int(item)
+        self.queue('lower', 'brick') # Under the HUD and any overlay text
+
+    def damage_options(self, index):
+        """Outline options showing how many hits a brick has taken."""
+        damage = self.engine.grid.damage(index)
+        if not damage:
+            return '-outline black -width 1'
+        return f'-outline {BRICK_DAMAGED_OUTLINE} -width {2 * damage}'
+
+    # --- Per-frame diff ---
+
+    def render(self, ball_xs=None, ball_ys=None):
+        """Sends the changes since the last frame to Tk as one script.
+
+        ball_xs/ball_ys override the engine's ball positions, e.g. with
+        interpolated ones.
+        """
+        engine = self.engine
+        if ball_xs is None:
+            ball_xs, ball_ys = engine.balls.x, engine.balls.y
+
+        self.follow(ball_xs[0], ball_ys[0]) # The view tracks the lead ball
+        self.render_balls(ball_xs, ball_ys)
+        self.render_paddle()
+
+        if engine.damaged and not self.degraded:
+            for index in engine.damaged:
+                item = self.brick_items.get(index)
+                if item is not None and engine.alive[index]:
+                    self.queue('itemconfigure', item, self.damage_options(index))
+            engine.damaged.clear()
+
+        if engine.destroyed:
+            # Bricks outside the view never had an item
+            items = []
+            for index in engine.destroyed:
+                item = self.brick_items.pop(index, None)
+                if item is not None:
+                    items.append(item)
+                    if not self.degraded:
+                        self.burst(index)
+            engine.destroyed.clear()
+            if items:
+                self.queue('delete', *items) # Every brick lost this frame at once
+
+        self.particles.update()
+
+        if engine.score != self.drawn_score:
+            self.queue('itemconfigure', self.score_text, '-text',
+                       tcl_quote(f"Score: {engine.score}"))
+            self.drawn_score = engine.score
+        if engine.lives != self.drawn_lives:
+            self.queue('itemconfigure', self.lives_text, '-text',
+                       tcl_quote(f"Lives: {engine.lives}"))
+            self.drawn_lives = engine.lives
+
+        self.flush()
+
+    def burst(self, index):
+        """Particles in the colour of a brick that just broke."""
+        x1, y1, x2, y2 = self.engine.grid.brick_coords(index)
+        kind = self.engine.level.cells[index] & TYPE_MASK # Its cell is empty now
+        self.particles.burst((x1 + x2) / 2, (y1 + y2) / 2,
+                             BRICK_TYPE_COLORS[kind] or self.brick_color)
+
+    def render_balls(self, ball_xs, ball_ys):
+        count = len(ball_xs)
+        if count > len(self.ball_ids):
+            # Split balls start where their parent is, so draw them there
+            self.flush()
+            creates = []
+            for x, y in zip(ball_xs[len(self.ball_ids):], ball_ys[len(self.ball_ids):]):
+                x -= self.view_x
+                y -= self.view_y
+                creates.append(f'[{self.path} create oval {x - BALL_RADIUS} {y - BALL_RADIUS} '
+                               f'{x + BALL_RADIUS} {y + BALL_RADIUS} '
+                               f'-fill {BALL_COLOR} -tags ball_tag]')
+                self.drawn_balls.append((x, y))
+            ids = self.canvas.tk.splitlist(self.canvas.tk.eval('list ' + ' '.join(creates)))
+            self.ball_ids.extend(int(item) for item in ids)
+        elif count < len(self.ball_ids):
+            self.queue('delete', *self.ball_ids[count:])
+            del self.ball_ids[count:]
+            del self.drawn_balls[count:]
+
+        view_x = self.view_x
+        view_y = self.view_y
+        drawn = self.drawn_balls
+        for index in range(count):
+            x = ball_xs[index] - view_x
+            y = ball_ys[index] - view_y
+            if (x, y) != drawn[index]:
+                self.queue('coords', self.ball_ids[index], x - BALL_RADIUS, y - BALL_RADIUS,
+                           x + BALL_RADIUS, y + BALL_RADIUS)
+                drawn[index] = (x, y)
+
+    def render_paddle(self):
+        paddle = self.engine.paddle
+        x = paddle.x - self.view_x
+        y = paddle.y - self.view_y
+        if self.drawn_paddle == (x, y, paddle.width):
+            return
+
+        if self.drawn_paddle is not None and self.drawn_paddle[2] == paddle.width:
+            # Same size, so a single move of the whole tag is enough
+            self.queue('move', 'paddle_tag', x - self.drawn_paddle[0], y - self.drawn_paddle[1])
+        else:
+            x1, y1, x2, y2 = x, y, x + paddle.width, y + PADDLE_HEIGHT
+            r = PADDLE_CORNER_RADIUS # Radius for the rounded corner
+            rect_id, left_circle_id, right_circle_id = self.paddle_ids
+            # Central rectangle is slightly shorter to accommodate the corners
+            self.queue('coords', rect_id, x1 + r, y1, x2 - r, y2)
+            self.queue('coords', left_circle_id, x1, y1, x1 + PADDLE_HEIGHT, y2)
+            self.queue('coords', right_circle_id, x2 - PADDLE_HEIGHT, y1, x2, y2)
+        self.drawn_paddle = (x, y, paddle.width)
+
+    # --- Tcl batching ---
+
+    def queue(self, command, *args):
+        """Adds one canvas command to this frame's script."""
+        self.script.append(' '.join([self.path, command] + [str(arg) for arg in args]))
+
+    def flush(self):
+        """Runs every queued command in a single Tcl invocation."""
+        if self.script:
+            self.canvas.tk.eval('\n'.join(self.script))
+            self.script.clear()
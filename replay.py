@@ -0,0 +1,212 @@
+# replay.py
+
+"""Deterministic input recording and replay.
+
+The game applies player input once per physics tick, so a game is fully
+described by its settings, seed and one byte per tick saying which arrow keys
+were held, which discrete paddle moves were made and whether the ball was
+frozen (paused, counting down, or showing a lost life). InputRecorder builds
+that log in an array and saves it in a small binary file; Replayer feeds it
+back, either to the Tk game in real time or to a headless engine at full
+speed:
+
+    python replay.py game.bbr            # headless, checks the final state
+"""
+
+import argparse
+import json
+import struct
+import sys
+import time
+from array import array
+
+from constants import PHYSICS_HZ, SPEED_MULTIPLIERS, PADDLE_SIZES, PADDLE_SPEED
+from engine import Engine, board_size, EVENT_GAME_OVER, EVENT_WON
+from levels import load_level
+from loop import physics_dt
+
+# --- Tick Codes ---
+# Bits 0-1: Left presses this tick, bits 2-3: Right presses, bit 4: Left
+# held, bit 5: Right held, bit 6: frozen
+MOVE_MASK = 0x03
+RIGHT_SHIFT = 2
+HELD_LEFT = 0x10
+HELD_RIGHT = 0x20
+FROZEN = 0x40
+
+# --- Session Events (kept separately, they are rare) ---
+START = 1
+PAUSE = 2
+RESUME = 3
+
+MAGIC = b'BBRP'
+VERSION = 2
+HEADER = struct.Struct('<4sBHIH') # magic, version, physics Hz, seed, settings length
+COUNTS = struct.Struct('<II') # ticks, events
+FINAL = struct.Struct('<ddii') # ball x, ball y, score, lives after the last tick
+
+
+def encode(left, right, frozen, held_left=False, held_right=False):
+    """Packs one tick of input into a byte."""
+    code = min(left, MOVE_MASK) | (min(right, MOVE_MASK) << RIGHT_SHIFT)
+    if held_left:
+        code |= HELD_LEFT
+    if held_right:
+        code |= HELD_RIGHT
+    return code | FROZEN if frozen else code
+
+
+def apply_moves(engine, code, dt):
+    """Applies a tick's paddle input in the order the game does."""
+    for _ in range(code & MOVE_MASK):
+        engine.move_paddle(-PADDLE_SPEED)
+    for _ in range((code >> RIGHT_SHIFT) & MOVE_MASK):
+        engine.move_paddle(PADDLE_SPEED)
+    engine.steer(bool(code & HELD_RIGHT) - bool(code & HELD_LEFT), dt)
+
+
+def make_engine(settings, seed):
+    """An engine configured like the recorded game at its first tick."""
+    board = {}
+    if settings.get('level'):
+        level = load_level(settings['level'])
+        width, height = board_size(level.rows, level.cols)
+        board = dict(width=width, height=height, level=level)
+    return Engine(speed=SPEED_MULTIPLIERS.get(settings.get('ball_speed'), 1.0),
+                  paddle_width=PADDLE_SIZES.get(settings.get('paddle_size'), 100),
+                  seed=seed, **board)
+
+
+def final_state(engine):
+    return (engine.ball_x, engine.ball_y, engine.score, engine.lives)
+
+
+class Recording:
+    """A recorded game: settings, seed, per-tick input codes and events."""
+    def __init__(self, settings, seed, physics_hz=PHYSICS_HZ):
+        self.settings = dict(settings)
+        self.seed = seed
+        self.physics_hz = physics_hz
+        self.ticks = array('B')
+        self.event_ticks = array('I')
+        self.event_codes = array('B')
+        self.final = None
+
+    @property
+    def dt(self):
+        return physics_dt(self.physics_hz)
+
+    def save(self, path):
+        settings = json.dumps(self.settings, sort_keys=True).encode()
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.physics_hz, self.seed, len(settings)))
+            f.write(settings)
+            f.write(COUNTS.pack(len(self.ticks), len(self.event_codes)))
+            f.write(self.ticks.tobytes())
+            f.write(self.event_ticks.tobytes())
+            f.write(self.event_codes.tobytes())
+            f.write(FINAL.pack(*(self.final or (0.0, 0.0, -1, -1))))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, physics_hz, seed, settings_len = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} brick breaker replay")
+        offset = HEADER.size
+        settings = json.loads(data[offset:offset + settings_len])
+        offset += settings_len
+        recording = cls(settings, seed, physics_hz)
+        tick_count, event_count = COUNTS.unpack_from(data, offset)
+        offset += COUNTS.size
+        recording.ticks.frombytes(data[offset:offset + tick_count])
+        offset += tick_count
+        size = recording.event_ticks.itemsize * event_count
+        recording.event_ticks.frombytes(data[offset:offset + size])
+        offset += size
+        recording.event_codes.frombytes(data[offset:offset + event_count])
+        offset += event_count
+        final = FINAL.unpack_from(data, offset)
+        recording.final = None if final[2] < 0 else final
+        return recording
+
+
+class InputRecorder:
+    """Appends one code per physics tick to a Recording."""
+    def __init__(self, settings, seed):
+        self.recording = Recording(settings, seed)
+
+    def record(self, code):
+        self.recording.ticks.append(code)
+
+    def event(self, code):
+        self.recording.event_ticks.append(len(self.recording.ticks))
+        self.recording.event_codes.append(code)
+
+    def rewind(self, ticks):
+        """Drops the last `ticks` ticks, for a game that was rewound."""
+        recording = self.recording
+        del recording.ticks[max(len(recording.ticks) - ticks, 0):]
+        while recording.event_ticks and recording.event_ticks[-1] > len(recording.ticks):
+            recording.event_ticks.pop()
+            recording.event_codes.pop()
+
+    def finish(self, engine):
+        """Stores the final state so replays can check they matched."""
+        self.recording.final = final_state(engine)
+        return self.recording
+
+
+class Replayer:
+    """Hands a Recording's tick codes back one at a time."""
+    def __init__(self, recording):
+        self.recording = recording
+        self.position = 0
+
+    def next_tick(self):
+        """Returns the next tick's code, or None when the recording is over."""
+        if self.position >= len(self.recording.ticks):
+            return None
+        code = self.recording.ticks[self.position]
+        self.position += 1
+        return code
+
+
+def replay_headless(recording):
+    """Replays a recording as fast as possible. Returns the final engine."""
+    engine = make_engine(recording.settings, recording.seed)
+    dt = recording.dt
+    for code in recording.ticks:
+        apply_moves(engine, code, dt)
+        if code & FROZEN:
+            continue
+        if engine.step(dt) & (EVENT_GAME_OVER | EVENT_WON):
+            break
+    return engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded game headlessly.")
+    parser.add_argument('path')
+    args = parser.parse_args(argv)
+
+    recording = Recording.load(args.path)
+    start = time.perf_counter()
+    engine = replay_headless(recording)
+    elapsed = time.perf_counter() - start
+
+    ticks = len(recording.ticks)
+    print(f"{ticks} ticks in {elapsed:.3f} s ({ticks / elapsed:.0f} ticks/s), "
+          f"score {engine.score}, lives {engine.lives}")
+    if recording.final is not None:
+        if final_state(engine) != recording.final:
+            print(f"MISMATCH: recorded {recording.final}, replayed {final_state(engine)}")
+            return 1
+        print("Final state matches the recording")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
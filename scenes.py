@@ -0,0 +1,58 @@
+# scenes.py
+
+"""Menu screens that are built once and then only shown and hidden.
+
+A Scene is the canvas items under one tag plus any widgets placed over the
+canvas. Showing one flips its items to state='normal' and places its
+widgets; hiding flips them to 'hidden' and forgets the placement. Nothing is
+created or destroyed after startup, so switching screens is cheap and
+repeated navigation cannot leak widgets.
+"""
+
+
+class Scene:
+    """Canvas items tagged `tag`, plus widgets placed relative to the canvas."""
+    def __init__(self, canvas, tag):
+        self.canvas = canvas
+        self.tag = tag
+        self.widgets = [] # (widget, x, y) in canvas coordinates
+
+    def add_widget(self, widget, x, y):
+        self.widgets.append((widget, x, y))
+
+    def show(self):
+        self.canvas.itemconfigure(self.tag, state='normal')
+        self.canvas.tag_raise(self.tag) # Above anything drawn since
+        # Widgets sit in the canvas's parent, so offset by where the canvas is
+        left = self.canvas.winfo_x()
+        top = self.canvas.winfo_y()
+        for widget, x, y in self.widgets:
+            widget.place(x=x + left, y=y + top)
+
+    def hide(self):
+        self.canvas.itemconfigure(self.tag, state='hidden')
+        for widget, _, _ in self.widgets:
+            widget.place_forget()
+
+
+class SceneManager:
+    """Shows at most one named scene at a time."""
+    def __init__(self):
+        self.scenes = {}
+        self.current = None
+
+    def add(self, name, scene):
+        self.scenes[name] = scene
+        scene.hide()
+
+    def show(self, name):
+        if self.current == name:
+            return
+        self.hide()
+        self.scenes[name].show()
+        self.current = name
+
+    def hide(self):
+        if self.current is not None:
+            self.scenes[self.current].hide()
+            self.current = None
@@ -0,0 +1,303 @@
+# scores.py
+
+"""Persistent store of finished runs, with leaderboards and percentiles.
+
+Every finished game goes into one SQLite table: its settings, seed, score,
+lives lost, whether it was won, how long it lasted and, optionally, where
+its replay was saved. The database runs in WAL mode, so queries never wait
+for a write. All writes go through one background thread. record() only
+puts a row on a queue. The thread writes whatever has queued up in a single
+transaction, so neither the Tk loop nor a sweep ever waits on the disk.
+
+Leaderboards read an index on (settings, score). Percentiles read a small
+per-settings score histogram that is updated in the same transaction as
+the runs. Both stay in the milliseconds however many runs are stored. The
+best score for each setting is also kept in memory, so the game-over
+screen can show it without a query on the Tk thread.
+
+Even opening the database happens on the writer thread. If it cannot be
+opened (a read-only directory, a locked or corrupt file), the store says so
+once and stops recording, and the game carries on without it.
+
+    python scores.py top --speed Normal --paddle Normal
+    python scores.py stats
+"""
+
+import argparse
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+DEFAULT_PATH = 'brick_scores.db'
+WRITE_BATCH = 10000 # Most rows written in one transaction
+
+COLUMNS = ('finished', 'source', 'ball_speed', 'paddle_size', 'brick_color', 'level',
+           'seed', 'score', 'lives_lost', 'won', 'seconds', 'replay')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    finished REAL NOT NULL,       -- Unix time
+    source TEXT NOT NULL,         -- 'tk', 'sweep:keyboard', ...
+    ball_speed TEXT NOT NULL,
+    paddle_size TEXT NOT NULL,
+    brick_color TEXT,
+    level TEXT NOT NULL,          -- '' for the default wall
+    seed INTEGER,
+    score INTEGER NOT NULL,
+    lives_lost INTEGER NOT NULL,
+    won INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    replay TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_board ON runs (ball_speed, paddle_size, level, score DESC);
+CREATE INDEX IF NOT EXISTS runs_score ON runs (score DESC);
+CREATE INDEX IF NOT EXISTS runs_finished ON runs (finished);
+CREATE TABLE IF NOT EXISTS score_counts (
+    ball_speed TEXT NOT NULL,
+    paddle_size TEXT NOT NULL,
+    level TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    runs INTEGER NOT NULL,
+    PRIMARY KEY (ball_speed, paddle_size, level, score)
+) WITHOUT ROWID;
+"""
+
+INSERT_RUN = f"INSERT INTO runs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+COUNT_SCORE = """
+INSERT INTO score_counts VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (ball_speed, paddle_size, level, score) DO UPDATE SET runs = runs + excluded.runs
+"""
+BEST_SCORES = """
+SELECT ball_speed, paddle_size, level, max(score) FROM score_counts
+GROUP BY ball_speed, paddle_size, level
+"""
+ATTACH_REPLAY = "UPDATE runs SET replay = ? WHERE finished = ? AND seed = ?"
+
+
+def run_row(settings, score, lives_lost, won, seconds, seed=None,
+            source='tk', replay=None, finished=None):
+    """A runs row from game settings (as stored with recordings) and a result."""
+    return (time.time() if finished is None else finished, source,
+            str(settings.get('ball_speed', 'Normal')),
+            str(settings.get('paddle_size', 'Normal')),
+            settings.get('brick_color'), settings.get('level') or '',
+            seed, int(score), int(lives_lost), int(bool(won)), float(seconds), replay)
+
+
+def connect(path):
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = NORMAL") # Durable enough with WAL, far fewer fsyncs
+    return db
+
+
+def where(ball_speed=None, paddle_size=None, level=None):
+    """A WHERE clause and its parameters for the given settings filters."""
+    terms = []
+    params = []
+    for column, value in (('ball_speed', ball_speed), ('paddle_size', paddle_size),
+                          ('level', level)):
+        if value is not None:
+            terms.append(f"{column} = ?")
+            params.append(value)
+    return (" WHERE " + " AND ".join(terms)) if terms else "", params
+
+
+class ScoreStore:
+    """Finished runs in SQLite, written from a background thread."""
+    def __init__(self, path=DEFAULT_PATH, batch=WRITE_BATCH):
+        self.path = path
+        self.batch = batch
+        self.recording = True # Until the database fails to open
+        self.error = None # Why it failed
+        self.opened = threading.Event() # Set once the writer has tried
+        # (ball_speed, paddle_size, level) -> best score, filled in by the writer
+        self.best_scores = {}
+        self.reader = None # Opened by the first query, on the querying thread
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.write_loop, name='score-writer',
+                                       daemon=True)
+        self.thread.start()
+
+    # --- Writing (any thread, never blocks) ---
+
+    def record(self, row):
+        """Queues one run_row() for writing."""
+        if self.recording:
+            self.queue.put((INSERT_RUN, row))
+
+    def attach_replay(self, finished, seed, path):
+        """Notes where a recorded run's replay was saved."""
+        if self.recording:
+            self.queue.put((ATTACH_REPLAY, (path, finished, seed)))
+
+    def flush(self):
+        """Waits until everything queued so far is on disk."""
+        self.queue.join()
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    def open(self):
+        """The writer's connection, with the schema made and the best scores read.
+
+        None if the database cannot be opened, which turns recording off.
+        """
+        db = None
+        try:
+            db = connect(self.path)
+            db.executescript(SCHEMA)
+            self.best_scores = {(ball_speed, paddle_size, level): score for
+                                ball_speed, paddle_size, level, score
+                                in db.execute(BEST_SCORES)}
+        except sqlite3.Error as error:
+            print(f"Not recording runs, cannot open {self.path}: {error}", file=sys.stderr)
+            if db is not None:
+                db.close()
+                db = None
+            self.recording = False
+            self.error = error
+        self.opened.set()
+        return db
+
+    def write_loop(self):
+        db = self.open()
+        running = True
+        while running:
+            items = [self.queue.get()]
+            # Whatever else is already waiting goes in the same transaction
+            while len(items) < self.batch:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            running = None not in items
+            writes = [item for item in items if item is not None]
+            try:
+                if db is not None: # Else recording is off; just drain the queue
+                    self.write(db, writes)
+            except Exception as error:
+                # Lose this batch, not the thread and every run after it
+                print(f"Could not store {len(writes)} queued writes: {error}", file=sys.stderr)
+            finally:
+                for _ in items:
+                    self.queue.task_done()
+        if db is not None:
+            db.close()
+
+    def write(self, db, items):
+        runs = [row for statement, row in items if statement is INSERT_RUN]
+        counts = {}
+        for row in runs:
+            key = (row[2], row[3], row[5], row[7]) # Settings and score
+            counts[key] = counts.get(key, 0) + 1
+        with db:
+            db.executemany(INSERT_RUN, runs)
+            db.executemany(COUNT_SCORE, [key + (n,) for key, n in counts.items()])
+            # Replays are attached after their run, which is queued first
+            for statement, params in items:
+                if statement is not INSERT_RUN:
+                    db.execute(statement, params)
+        best_scores = self.best_scores
+        for ball_speed, paddle_size, level, score in counts:
+            key = (ball_speed, paddle_size, level)
+            best = best_scores.get(key)
+            if best is None or score > best:
+                best_scores[key] = score
+
+    # --- Queries (on the thread that opened the reader) ---
+
+    def query(self, sql, params=()):
+        self.opened.wait() # The writer makes the schema
+        if self.error is not None:
+            raise self.error
+        if self.reader is None:
+            self.reader = connect(self.path)
+        return self.reader.execute(sql, params).fetchall()
+
+    def leaderboard(self, ball_speed=None, paddle_size=None, level=None, limit=10):
+        """The best runs, highest score first, as dicts."""
+        clause, params = where(ball_speed, paddle_size, level)
+        rows = self.query(f"SELECT {', '.join(COLUMNS)} FROM runs{clause} "
+                          f"ORDER BY score DESC LIMIT ?", params + [limit])
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def best_known(self, ball_speed, paddle_size, level=''):
+        """The best stored score for these settings, from memory (None if none).
+
+        None too until the writer has read the database. Runs still queued
+        are not counted yet. Safe on any thread.
+        """
+        return self.best_scores.get((ball_speed, paddle_size, level))
+
+    def best(self, ball_speed=None, paddle_size=None, level=None):
+        clause, params = where(ball_speed, paddle_size, level)
+        return self.query(f"SELECT max(score) FROM score_counts{clause}", params)[0][0]
+
+    def histogram(self, ball_speed=None, paddle_size=None, level=None):
+        """[(score, runs)] in ascending score order."""
+        clause, params = where(ball_speed, paddle_size, level)
+        return self.query(f"SELECT score, sum(runs) FROM score_counts{clause} "
+                          f"GROUP BY score ORDER BY score", params)
+
+    def percentiles(self, fractions=(0.1, 0.5, 0.9, 0.99), **filters):
+        """The score at each fraction of runs (nearest rank), and the run count."""
+        histogram = self.histogram(**filters)
+        total = sum(runs for _, runs in histogram)
+        results = []
+        for fraction in fractions:
+            rank = max(int(fraction * total + 0.5), 1)
+            seen = 0
+            for score, runs in histogram:
+                seen += runs
+                if seen >= rank:
+                    results.append(score)
+                    break
+            else:
+                results.append(None)
+        return results, total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the stored runs.")
+    parser.add_argument('command', choices=('top', 'stats'))
+    parser.add_argument('--db', default=DEFAULT_PATH)
+    parser.add_argument('--speed', help='ball speed setting, e.g. Normal')
+    parser.add_argument('--paddle', help='paddle size setting, e.g. Normal')
+    parser.add_argument('--level', help="level file ('' for the default wall)")
+    parser.add_argument('-n', type=int, default=10, help='leaderboard length')
+    args = parser.parse_args(argv)
+
+    store = ScoreStore(args.db)
+    store.opened.wait()
+    if store.error is not None:
+        parser.error(f"cannot open {args.db}: {store.error}")
+    filters = dict(ball_speed=args.speed, paddle_size=args.paddle, level=args.level)
+    start = time.perf_counter()
+    if args.command == 'top':
+        for place, run in enumerate(store.leaderboard(limit=args.n, **filters), 1):
+            finished = time.strftime('%Y-%m-%d %H:%M', time.localtime(run['finished']))
+            print(f"{place:3d}. {run['score']:5d}  {run['ball_speed']}/{run['paddle_size']}"
+                  f"{' ' + run['level'] if run['level'] else ''}  {finished}  "
+                  f"{run['source']}{'  ' + run['replay'] if run['replay'] else ''}")
+    else:
+        fractions = (0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+        scores, total = store.percentiles(fractions, **filters)
+        print(f"{total} runs, best {store.best(**filters)}")
+        for fraction, score in zip(fractions, scores):
+            print(f"  p{fraction * 100:g}: {score}")
+    elapsed = time.perf_counter() - start
+    print(f"({elapsed * 1e3:.1f} ms)", file=sys.stderr)
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+# server.py
+
+"""asyncio game-session server hosting many headless games.
+
+Each TCP connection is one session: the client says HELLO with its settings,
+gets a WELCOME, then sends INPUT whenever its keys change and receives a
+STATE delta every few physics ticks (see protocol.py). All sessions are
+stepped together by one fixed-rate tick task with the same Engine rules and
+input handling as the Tk game, including the pause after a lost life.
+
+    python server.py --port 8765
+    python Brick_Break.py --connect 127.0.0.1:8765     # Tk game as a thin client
+    python loadgen.py --clients 300                     # measure throughput
+
+Clients name their level file in HELLO like recordings do; the server only
+opens levels by that file name inside its --levels directory, and plays the
+default wall otherwise.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import struct
+import sys
+
+from constants import PHYSICS_HZ, MAX_SUBSTEPS, LIFE_LOST_SECONDS
+from engine import EVENT_LIFE_LOST, EVENT_GAME_OVER, EVENT_WON
+from loop import FixedTimestep
+from replay import make_engine, encode, apply_moves, FROZEN
+from protocol import (
+    FRAME, HELLO, INPUT, INPUT_BODY, HELD_LEFT, HELD_RIGHT,
+    pack_welcome, pack_state,
+)
+
+SEND_EVERY = 2 # Physics ticks per STATE, i.e. 60 states a second
+LIFE_LOST_TICKS = LIFE_LOST_SECONDS * PHYSICS_HZ # Same pause as the Tk game
+WRITE_BUFFER_LIMIT = 64 * 1024 # Skip states to clients this far behind
+
+
+class Session:
+    """One hosted game and the connection it streams to."""
+    def __init__(self, session_id, settings, seed, writer):
+        self.id = session_id
+        self.engine = make_engine(settings, seed)
+        self.writer = writer
+        self.held = 0
+        self.left_moves = 0
+        self.right_moves = 0
+        self.frozen_until = 0 # Tick the lost-life pause ends at
+        self.events = 0 # Since the last STATE
+        self.over = False
+
+    def set_input(self, held, left_moves, right_moves):
+        self.held = held
+        self.left_moves += left_moves
+        self.right_moves += right_moves
+
+    def step(self, tick, dt):
+        code = encode(self.left_moves, self.right_moves, frozen=tick < self.frozen_until,
+                      held_left=self.held & HELD_LEFT, held_right=self.held & HELD_RIGHT)
+        self.left_moves = self.right_moves = 0
+        apply_moves(self.engine, code, dt)
+        if code & FROZEN:
+            return
+        events = self.engine.step(dt)
+        self.events |= events
+        if events & (EVENT_GAME_OVER | EVENT_WON):
+            self.over = True
+        elif events & EVENT_LIFE_LOST:
+            self.frozen_until = tick + LIFE_LOST_TICKS
+
+    def send_state(self, tick):
+        """Streams a delta, unless the client is not keeping up."""
+        if not self.over and self.writer.transport.get_write_buffer_size() > WRITE_BUFFER_LIMIT:
+            return # Changes keep piling up in the engine until the next send
+        engine = self.engine
+        self.writer.write(pack_state(tick, self.events, engine,
+                                     engine.destroyed, engine.damaged))
+        self.events = 0
+        engine.destroyed.clear()
+        engine.damaged.clear()
+
+
+class GameServer:
+    """Accepts sessions and steps all of them on one shared tick."""
+    def __init__(self, hz=PHYSICS_HZ, send_every=SEND_EVERY, level_dir=None):
+        self.hz = hz
+        self.level_dir = level_dir
+        self.send_every = send_every
+        self.sessions = {}
+        self.next_id = 1
+        self.tick = 0
+
+    async def handle(self, reader, writer):
+        session = None
+        try:
+            while True:
+                (length,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+                payload = await reader.readexactly(length)
+                kind = payload[0]
+                if kind == HELLO and session is None:
+                    settings = self.check_settings(json.loads(payload[1:]))
+                    seed = random.randrange(2**32)
+                    session = Session(self.next_id, settings, seed, writer)
+                    self.next_id += 1
+                    writer.write(pack_welcome(session.id, seed, self.hz, self.send_every))
+                    self.sessions[session.id] = session
+                elif kind == INPUT and session is not None:
+                    _, held, left_moves, right_moves = INPUT_BODY.unpack(payload)
+                    session.set_input(held, left_moves, right_moves)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except (IndexError, ValueError, struct.error) as error:
+            # A malformed frame drops this session, never the server
+            print(f"Dropped a client after a bad message: {error!r}", file=sys.stderr)
+        finally:
+            if session is not None:
+                self.sessions.pop(session.id, None)
+            writer.close()
+
+    def check_settings(self, settings):
+        """Keeps the settings screen choices, and a level file only if it is one of ours."""
+        if not isinstance(settings, dict):
+            raise ValueError("HELLO settings are not an object")
+        checked = {key: value for key, value in settings.items()
+                   if key in ('ball_speed', 'paddle_size', 'brick_color')
+                   and isinstance(value, str)}
+        level = settings.get('level')
+        if level and isinstance(level, str) and self.level_dir is not None:
+            path = os.path.join(self.level_dir, os.path.basename(level))
+            if os.path.isfile(path):
+                checked['level'] = path
+        return checked
+
+    async def run_ticks(self):
+        loop = asyncio.get_running_loop()
+        timestep = FixedTimestep(self.hz, MAX_SUBSTEPS, clock=loop.time)
+        dt = timestep.dt
+        while True:
+            await asyncio.sleep(timestep.step_seconds - timestep.accumulator)
+            for _ in range(timestep.advance()):
+                self.tick += 1
+                send = self.tick % self.send_every == 0
+                for session in list(self.sessions.values()):
+                    session.step(self.tick, dt)
+                    if send or session.over:
+                        session.send_state(self.tick)
+                    if session.over:
+                        # Final state is out; the client closes when it likes
+                        del self.sessions[session.id]
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving brick breaker sessions on {host}:{port}", file=sys.stderr)
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.run_ticks())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host headless brick breaker sessions.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--levels', metavar='DIR', help='directory of level files to host')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(GameServer(level_dir=args.levels).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+# snapshot.py
+
+"""Save states of an Engine, and a rewind buffer of recent ticks.
+
+Everything a game needs to carry on is in the Engine, so a state is just
+its numbers packed back to back: score, lives, bricks left, the paddle and
+serve velocity (STATE_HEAD), then each ball column as doubles, then one byte
+per brick cell. snapshot() and restore() turn an engine into such bytes and
+back, e.g. to checkpoint a replay-driven test; save_state() and load_state()
+put them in a file.
+
+RewindBuffer keeps the last few seconds of per-tick states in memory that
+is allocated up front. Bricks change far less often than balls move, so the
+brick cells are only copied on ticks where engine.bricks_version changed,
+into a second ring that the tick slots point into. A capture is then a
+struct pack and four column copies, without allocating.
+"""
+
+import struct
+from array import array
+
+from constants import PHYSICS_HZ, REWIND_SECONDS
+
+MAGIC = b'BBSS'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sBII') # magic, version, rows, cols
+STATE_HEAD = struct.Struct('<IiIH5d') # score, lives, bricks left, balls,
+                                      # paddle x, vx, width, serve dx, dy
+CELL_BUDGET = 16 * 1024 * 1024 # Most bytes a RewindBuffer spends on brick copies
+
+
+def pack_head(engine, buffer, offset):
+    paddle = engine.paddle
+    STATE_HEAD.pack_into(buffer, offset, engine.score, engine.lives, engine.bricks_left,
+                         len(engine.balls), paddle.x, paddle.vx, paddle.width,
+                         engine.serve_dx, engine.serve_dy)
+
+
+def pack_balls(balls, buffer, offset, stride):
+    """Copies the ball columns to buffer, each column `stride` bytes apart."""
+    size = 8 * len(balls)
+    for column in (balls.x, balls.y, balls.dx, balls.dy):
+        buffer[offset:offset + size] = memoryview(column).cast('B')
+        offset += stride
+
+
+def unpack_state(engine, view, offset, stride, cells):
+    """Sets the engine to a packed state; cells is the brick bytes."""
+    (engine.score, engine.lives, engine.bricks_left, count, x, vx, width,
+     engine.serve_dx, engine.serve_dy) = STATE_HEAD.unpack_from(view, offset)
+    offset += STATE_HEAD.size
+    paddle = engine.paddle
+    paddle.x = x
+    paddle.vx = vx
+    paddle.width = width
+
+    balls = engine.balls
+    balls.clear()
+    for column in (balls.x, balls.y, balls.dx, balls.dy):
+        column.frombytes(view[offset:offset + 8 * count])
+        offset += stride
+
+    engine.alive[:] = cells
+    engine.bricks_version += 1
+    engine.destroyed.clear()
+    engine.damaged.clear()
+
+
+def snapshot(engine):
+    """The engine's whole game state as bytes."""
+    stride = 8 * len(engine.balls)
+    data = bytearray(FILE_HEADER.size + STATE_HEAD.size + 4 * stride + engine.brick_count)
+    FILE_HEADER.pack_into(data, 0, MAGIC, VERSION, engine.rows, engine.cols)
+    offset = FILE_HEADER.size
+    pack_head(engine, data, offset)
+    offset += STATE_HEAD.size
+    pack_balls(engine.balls, data, offset, stride)
+    offset += 4 * stride
+    data[offset:] = engine.alive
+    return bytes(data)
+
+
+def restore(engine, data):
+    """Puts an engine back to a snapshot() of a game on the same board."""
+    magic, version, rows, cols = FILE_HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} brick breaker save state")
+    if (rows, cols) != (engine.rows, engine.cols):
+        raise ValueError(f"save state is for a {rows}x{cols} board, "
+                         f"not {engine.rows}x{engine.cols}")
+    view = memoryview(data)
+    offset = FILE_HEADER.size
+    count = STATE_HEAD.unpack_from(view, offset)[3]
+    cells = offset + STATE_HEAD.size + 4 * 8 * count
+    unpack_state(engine, view, offset, 8 * count, view[cells:cells + engine.brick_count])
+
+
+def save_state(engine, path):
+    with open(path, 'wb') as f:
+        f.write(snapshot(engine))
+    return path
+
+
+def load_state(engine, path):
+    with open(path, 'rb') as f:
+        restore(engine, f.read())
+
+
+class RewindBuffer:
+    """The engine's state at each of the last `seconds` of physics ticks."""
+    def __init__(self, engine, seconds=REWIND_SECONDS, hz=PHYSICS_HZ, ball_capacity=8):
+        self.engine = engine
+        self.capacity = max(1, int(seconds * hz))
+        self.allocate(ball_capacity)
+
+        # Brick copies; as many as ticks unless that would be huge
+        self.cell_size = engine.brick_count
+        self.cell_capacity = max(1, min(self.capacity,
+                                        CELL_BUDGET // max(self.cell_size, 1)))
+        self.cells = bytearray(self.cell_capacity * self.cell_size)
+        self.cell_numbers = array('q', [-1]) * self.cell_capacity # Copy held per position
+        self.slot_cells = array('q', [-1]) * self.capacity # Copy each tick uses
+        self.clear()
+
+    def allocate(self, ball_capacity):
+        self.ball_capacity = ball_capacity
+        self.stride = 8 * ball_capacity
+        self.slot_size = STATE_HEAD.size + 4 * self.stride
+        self.slots = bytearray(self.capacity * self.slot_size)
+
+    def clear(self):
+        """Forgets all history, e.g. when a new game starts."""
+        self.count = 0 # Ticks captured, counting ones since overwritten
+        self.oldest = 0 # Oldest tick still held
+        self.cell_count = 0
+        self.cell_version = None # engine.bricks_version of the newest copy
+
+    def __len__(self):
+        return self.count - self.oldest
+
+    def grow(self, balls):
+        """Makes room for more balls per tick, keeping the history."""
+        old_slots, old_stride, old_size = self.slots, self.stride, self.slot_size
+        capacity = self.ball_capacity
+        while capacity < balls:
+            capacity *= 2
+        self.allocate(capacity)
+        for slot in range(self.capacity):
+            start = slot * old_size
+            source = start + STATE_HEAD.size
+            target = slot * self.slot_size + STATE_HEAD.size
+            self.slots[slot * self.slot_size:target] = old_slots[start:source]
+            for _ in range(4): # x, y, dx, dy columns
+                self.slots[target:target + old_stride] = old_slots[source:source + old_stride]
+                source += old_stride
+                target += self.stride
+
+    def capture(self):
+        """Stores the engine's current state as the newest tick."""
+        engine = self.engine
+        if len(engine.balls) > self.ball_capacity:
+            self.grow(len(engine.balls))
+
+        if engine.bricks_version != self.cell_version:
+            position = self.cell_count % self.cell_capacity
+            start = position * self.cell_size
+            self.cells[start:start + self.cell_size] = engine.alive
+            self.cell_numbers[position] = self.cell_count
+            self.cell_count += 1
+            self.cell_version = engine.bricks_version
+
+        slot = self.count % self.capacity
+        offset = slot * self.slot_size
+        pack_head(engine, self.slots, offset)
+        pack_balls(engine.balls, self.slots, offset + STATE_HEAD.size, self.stride)
+        self.slot_cells[slot] = self.cell_count - 1
+        self.count += 1
+        self.oldest = max(self.oldest, self.count - self.capacity)
+
+    def held(self, tick):
+        """Whether a tick's brick copy has not been overwritten since."""
+        number = self.slot_cells[tick % self.capacity]
+        return self.cell_numbers[number % self.cell_capacity] == number
+
+    def rewind(self, ticks):
+        """Restores the state from `ticks` captures ago, or the oldest held.
+
+        That tick and everything after it are dropped, since the game goes
+        on from there. Returns how many ticks back it went (0 if none).
+        """
+        target = max(self.count - ticks, self.oldest)
+        while target < self.count and not self.held(target):
+            target += 1 # Its bricks were overwritten; settle for a later tick
+        if target >= self.count:
+            return 0
+
+        slot = target % self.capacity
+        number = self.slot_cells[slot]
+        start = (number % self.cell_capacity) * self.cell_size
+        view = memoryview(self.slots)
+        unpack_state(self.engine, view, slot * self.slot_size, self.stride,
+                     memoryview(self.cells)[start:start + self.cell_size])
+
+        steps = self.count - target
+        self.count = target
+        self.cell_count = number + 1 # Later copies belong to dropped ticks
+        self.cell_version = self.engine.bricks_version
+        return steps
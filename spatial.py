@@ -0,0 +1,87 @@
+# spatial.py
+
+"""Uniform-grid spatial index and brick table for the brick wall.
+
+Bricks are laid out on a regular grid, so the cell a point falls in can be
+computed directly from its coordinates. Looking up the bricks under the ball
+and removing a destroyed brick are therefore O(1), however big the board is.
+
+A brick's whole state is one byte in its cell: the low four bits are its type
+(BRICK_NORMAL, BRICK_STEEL, ...) and the high four count the hits it has
+taken. Position and size follow from the grid, and hit points and score come
+from the per-type tables in constants.py, so a brick costs one byte.
+"""
+
+from constants import (
+    BRICK_WIDTH, BRICK_HEIGHT, BRICK_PADDING,
+    BRICK_OFFSET_TOP, BRICK_OFFSET_LEFT, BRICK_HITS,
+)
+
+TYPE_MASK = 0x0F
+DAMAGE_SHIFT = 4
+
+
+class BrickGrid:
+    """Maps board coordinates to brick indices (row-major, like setup_bricks)."""
+    def __init__(self, rows, cols, left=BRICK_OFFSET_LEFT, top=BRICK_OFFSET_TOP,
+                 width=BRICK_WIDTH, height=BRICK_HEIGHT, padding=BRICK_PADDING,
+                 occupied=None):
+        self.rows = rows
+        self.cols = cols
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.stride_x = width + padding
+        self.stride_y = height + padding
+        # One byte per cell, nonzero while a brick is there; any writable
+        # buffer of level cells works, e.g. a copy-on-write view of a file
+        if occupied is None:
+            occupied = bytearray(b'\x01' * (rows * cols))
+        self.occupied = occupied
+
+    def brick_coords(self, index):
+        row, col = divmod(index, self.cols)
+        x1 = self.left + col * self.stride_x
+        y1 = self.top + row * self.stride_y
+        return (x1, y1, x1 + self.width, y1 + self.height)
+
+    def kind(self, index):
+        return self.occupied[index] & TYPE_MASK
+
+    def damage(self, index):
+        return self.occupied[index] >> DAMAGE_SHIFT
+
+    def hit(self, index):
+        """Damages a brick. Returns True if that broke it."""
+        cell = self.occupied[index]
+        hits = BRICK_HITS[cell & TYPE_MASK]
+        if not hits:
+            return False # Indestructible
+        damage = (cell >> DAMAGE_SHIFT) + 1
+        if damage >= hits:
+            self.occupied[index] = 0
+            return True
+        self.occupied[index] = (cell & TYPE_MASK) | (damage << DAMAGE_SHIFT)
+        return False
+
+    def remove(self, index):
+        self.occupied[index] = 0
+
+    def cell_range(self, left, top, right, bottom):
+        """Returns the (row0, row1, col0, col1) cells an AABB can touch, inclusive."""
+        col0 = max(int((left - self.left) // self.stride_x), 0)
+        col1 = min(int((right - self.left) // self.stride_x), self.cols - 1)
+        row0 = max(int((top - self.top) // self.stride_y), 0)
+        row1 = min(int((bottom - self.top) // self.stride_y), self.rows - 1)
+        return row0, row1, col0, col1
+
+    def live_in(self, left, top, right, bottom):
+        """Yields live bricks in the cells an AABB touches, lowest index first."""
+        row0, row1, col0, col1 = self.cell_range(left, top, right, bottom)
+        occupied = self.occupied
+        for row in range(row0, row1 + 1):
+            base = row * self.cols
+            for index in range(base + col0, base + col1 + 1):
+                if occupied[index]:
+                    yield index
@@ -0,0 +1,230 @@
+# sweep.py
+
+"""Difficulty sweep over the game's tuning parameters.
+
+Plays seeded headless games for every combination of ball speed multiplier,
+paddle width, base speed, paddle speed and brick layout, spread over all
+cores with a process pool, and reports win rate, survival time and score
+distribution per combination as JSON or CSV:
+
+    python sweep.py --output sweep.csv
+    python sweep.py --speeds 0.75,1,1.25 --layouts default,big.bbl --games 50
+    python sweep.py --games 1000 --scores brick_scores.db
+
+The paddle is driven by a scripted player that holds the arrow keys with a
+human reaction delay and some aiming error, so harder settings do lose
+games. Survival is in game seconds, capped at --max-seconds. Every
+combination plays the same seeds, which keeps comparisons between them fair.
+With --scores every game is also stored as a run (see scores.py).
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from constants import (
+    BASE_SPEED, PADDLE_SPEED, PHYSICS_HZ, MAX_LIVES,
+    SPEED_MULTIPLIERS, PADDLE_SIZES,
+)
+from engine import Engine, board_size, EVENT_GAME_OVER, EVENT_WON
+from levels import Level, load_level
+from loop import physics_dt
+from bench import percentile, git_commit
+from autopilot import Autopilot
+from scores import ScoreStore, run_row
+
+PHYSICS_DT = physics_dt()
+DECIDE_EVERY = 4 # Ticks between changes of which key is held (about 30 Hz)
+REACTION_TICKS = 30 # The player reacts to where the ball was 0.25 s ago
+AIM_ERROR = 20.0 # Standard deviation of where on the paddle the player aims, px
+REAIM_CHANCE = 0.05 # Per decision
+DEAD_ZONE = 10 # Close enough to let go of the keys, px
+
+
+class KeyboardPlayer:
+    """Holds the arrow keys like a person would: late, and with some error."""
+    def __init__(self, rng, decide_every=DECIDE_EVERY,
+                 reaction_ticks=REACTION_TICKS, aim_error=AIM_ERROR):
+        self.rng = rng
+        self.decide_every = decide_every
+        self.aim_error = aim_error
+        self.aim = 0.0
+        self.direction = 0 # Key held: -1 left, 1 right, 0 neither
+        self.seen = deque(maxlen=reaction_ticks + 1) # Ball x, oldest first
+
+    def press(self, engine, tick):
+        self.seen.append(engine.ball_x)
+        if tick % self.decide_every == 0:
+            if self.rng.random() < REAIM_CHANCE:
+                self.aim = self.rng.gauss(0.0, self.aim_error)
+            offset = self.seen[0] + self.aim - engine.paddle.center()
+            self.direction = (offset > DEAD_ZONE) - (offset < -DEAD_ZONE)
+        engine.steer(self.direction, PHYSICS_DT)
+
+
+def load_layout(layout):
+    """'default', ROWSxCOLS for a full wall, or a level file path."""
+    if layout == 'default':
+        return None
+    size = re.fullmatch(r'(\d+)x(\d+)', layout.lower())
+    if size:
+        return Level.full(int(size.group(1)), int(size.group(2)))
+    return load_level(layout)
+
+
+def play_game(task):
+    """Plays one seeded game. Runs in a worker process."""
+    case_index, case, seed, max_ticks = task
+    level = load_layout(case['layout'])
+    board = {}
+    if level is not None:
+        width, height = board_size(level.rows, level.cols)
+        board = dict(width=width, height=height, level=level)
+    engine = Engine(speed=case['speed'], paddle_width=case['paddle_width'],
+                    base_speed=case['base_speed'], paddle_speed=case['paddle_speed'],
+                    seed=seed, **board)
+    if case['player'] == 'autopilot':
+        pilot = Autopilot(engine) # Bound by the case's paddle speed, like a player
+        press = lambda engine, tick: pilot.press(PHYSICS_DT)
+    else:
+        press = KeyboardPlayer(random.Random(seed)).press
+
+    won = False
+    tick = 0
+    while tick < max_ticks:
+        press(engine, tick)
+        events = engine.step(PHYSICS_DT)
+        tick += 1
+        if events & (EVENT_GAME_OVER | EVENT_WON):
+            won = not events & EVENT_GAME_OVER
+            break
+    return case_index, won, tick / PHYSICS_HZ, engine.score, engine.lives
+
+
+def setting_name(choices, value):
+    """The settings screen name for a value, e.g. 'Fast' for 1.5."""
+    for name, choice in choices.items():
+        if choice == value:
+            return name
+    return f'{value:g}'
+
+
+def run_settings(case):
+    """A case as the settings a stored run is filed under."""
+    settings = {'ball_speed': setting_name(SPEED_MULTIPLIERS, case['speed']),
+                'paddle_size': setting_name(PADDLE_SIZES, case['paddle_width'])}
+    if case['layout'] != 'default':
+        settings['level'] = case['layout']
+    return settings
+
+
+def summarize(case, results):
+    survival = sorted(seconds for _, seconds, _, _ in results)
+    scores = sorted(score for _, _, score, _ in results)
+    games = len(results)
+    return dict(case, **{
+        'games': games,
+        'win_rate': sum(won for won, _, _, _ in results) / games,
+        'survival_s_mean': sum(survival) / games,
+        'survival_s_p10': percentile(survival, 0.10),
+        'survival_s_p50': percentile(survival, 0.50),
+        'score_mean': sum(scores) / games,
+        'score_p10': percentile(scores, 0.10),
+        'score_p50': percentile(scores, 0.50),
+        'score_p90': percentile(scores, 0.90),
+        'lives_left_mean': sum(lives for _, _, _, lives in results) / games,
+    })
+
+
+def parse_floats(text):
+    return [float(item) for item in text.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--speeds', type=parse_floats,
+                        default=list(SPEED_MULTIPLIERS.values()),
+                        help='ball speed multipliers (default: the settings choices)')
+    parser.add_argument('--paddles', type=parse_floats, default=list(PADDLE_SIZES.values()),
+                        help='paddle widths (default: the settings choices)')
+    parser.add_argument('--base-speeds', type=parse_floats, default=[BASE_SPEED])
+    parser.add_argument('--paddle-speeds', type=parse_floats, default=[PADDLE_SPEED])
+    parser.add_argument('--layouts', default='default',
+                        help="comma-separated 'default', ROWSxCOLS or level files")
+    parser.add_argument('--player', choices=('keyboard', 'autopilot'), default='keyboard',
+                        help='who moves the paddle (default: %(default)s)')
+    parser.add_argument('--games', type=int, default=20, help='games per combination')
+    parser.add_argument('--max-seconds', type=float, default=300,
+                        help='game time before a game counts as not won')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--output', help='write the report here; .csv for CSV, else JSON')
+    parser.add_argument('--scores', metavar='DB', help='also store every game in this database')
+    args = parser.parse_args(argv)
+
+    cases = [{'speed': speed, 'paddle_width': paddle, 'base_speed': base,
+              'paddle_speed': paddle_speed, 'layout': layout, 'player': args.player}
+             for layout in args.layouts.split(',')
+             for base in args.base_speeds
+             for speed in args.speeds
+             for paddle in args.paddles
+             for paddle_speed in args.paddle_speeds]
+    max_ticks = int(args.max_seconds * PHYSICS_HZ)
+    tasks = [(index, case, args.seed + game, max_ticks)
+             for index, case in enumerate(cases) for game in range(args.games)]
+
+    store = ScoreStore(args.scores) if args.scores else None
+    settings = [run_settings(case) for case in cases]
+    source = f'sweep:{args.player}'
+
+    results = [[] for _ in cases]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        chunksize = max(1, len(tasks) // (4 * (args.workers or 1)))
+        for done, (index, *result) in enumerate(pool.map(play_game, tasks,
+                                                         chunksize=chunksize), 1):
+            results[index].append(result)
+            if store is not None:
+                won, seconds, score, lives = result
+                store.record(run_row(settings[index], score, MAX_LIVES - lives, won, seconds,
+                                     seed=tasks[done - 1][2], source=source))
+            if done % 100 == 0:
+                print(f"{done}/{len(tasks)} games", file=sys.stderr)
+    if store is not None:
+        store.close()
+    elapsed = time.perf_counter() - start
+    print(f"{len(tasks)} games in {elapsed:.1f} s on {args.workers} workers", file=sys.stderr)
+
+    rows = [summarize(case, case_results) for case, case_results in zip(cases, results)]
+    if args.output and args.output.endswith('.csv'):
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        return 0
+
+    report = {
+        'commit': git_commit(),
+        'seed': args.seed,
+        'games_per_case': args.games,
+        'max_seconds': args.max_seconds,
+        'cases': rows,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+# timers.py
+
+"""Game-time timers, fired by the physics tick instead of Tk's after().
+
+Delayed game events, such as the resume countdown and clearing the
+lost-life message, are scheduled here in physics ticks. advance() fires
+them, and the game calls it once for every tick it simulates. Timers
+therefore follow the simulation. They stop while the game is paused and
+keep pace with replays. They would run the same way headless or
+fast-forwarded. Every timer returns a handle that can cancel it, so
+restarting something never stacks a second copy on top of the first.
+"""
+
+import heapq
+
+
+class Timer:
+    """Handle for one scheduled callback."""
+    __slots__ = ('due', 'callback', 'args', 'cancelled')
+
+    def __init__(self, due, callback, args):
+        self.due = due
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """Stops the callback from running. Harmless once it has run."""
+        self.cancelled = True
+
+
+class Scheduler:
+    """Timers in a heap keyed on the tick they are due."""
+    def __init__(self):
+        self.tick = 0
+        self.heap = [] # (due tick, sequence, timer)
+        self.sequence = 0 # Keeps timers due on the same tick in order
+
+    def __len__(self):
+        return sum(not timer.cancelled for _, _, timer in self.heap)
+
+    def after(self, ticks, callback, *args):
+        """Runs callback(*args) once `ticks` more ticks have passed."""
+        timer = Timer(self.tick + max(int(ticks), 1), callback, args)
+        heapq.heappush(self.heap, (timer.due, self.sequence, timer))
+        self.sequence += 1
+        return timer
+
+    def advance(self, ticks=1):
+        """Moves game time on and runs every timer that came due, in order."""
+        self.tick += ticks
+        heap = self.heap
+        while heap and heap[0][0] <= self.tick:
+            _, _, timer = heapq.heappop(heap)
+            if not timer.cancelled:
+                timer.cancelled = True # Spent
+                timer.callback(*timer.args)
+
+    def clear(self):
+        """Cancels every pending timer."""
+        for _, _, timer in self.heap:
+            timer.cancelled = True
+        self.heap.clear()